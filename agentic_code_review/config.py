@@ -35,6 +35,10 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = False
+    # Server worker processes (ignored in debug mode). Requests are served from a thread
+    # pool in each process; the PR manager's client, in-flight download and PR file
+    # caches are per process, so duplicate webhooks only share them with one worker.
+    WORKERS: int = 1
 
     # Optional settings
     GITHUB_API_URL: str = "https://api.github.com"
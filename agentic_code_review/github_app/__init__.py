@@ -3,6 +3,14 @@
 This package provides the GitHub App server implementation.
 """
 
-from .server import GitHubApp
-
 __all__ = ["GitHubApp"]
+
+
+def __getattr__(name: str):
+    # The server pulls in the agents, which import this package's models back;
+    # loading it on first use keeps importing those models free of the cycle
+    if name == "GitHubApp":
+        from .server import GitHubApp
+
+        return GitHubApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
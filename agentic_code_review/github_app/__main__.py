@@ -25,13 +25,27 @@ def run_app() -> NoReturn:
     logger.info("Port: %d", settings.PORT)
     logger.info("Debug mode: %s", "enabled" if settings.DEBUG else "disabled")
 
-    # Create and run the app
-    github_app = GitHubApp()
-    github_app.app.run(
-        host=settings.HOST,
-        port=settings.PORT,
-        debug=settings.DEBUG
-    )
+    # Use Flask's reloading development server when debugging
+    if settings.DEBUG:
+        github_app = GitHubApp()
+        github_app.app.run(
+            host=settings.HOST,
+            port=settings.PORT,
+            debug=True
+        )
+    else:
+        # Otherwise serve the app with uvicorn, which hands requests to a thread pool
+        logger.info("Workers: %d", settings.WORKERS)
+        if settings.WORKERS > 1:
+            logger.warning("PR manager caches and in-flight request deduplication are per worker process")
+        uvicorn.run(
+            "agentic_code_review.github_app.server:create_app",
+            factory=True,
+            interface="wsgi",
+            host=settings.HOST,
+            port=settings.PORT,
+            workers=settings.WORKERS,
+        )
 
 
 if __name__ == "__main__":
@@ -1,15 +1,16 @@
 """GitHub authentication handling."""
 
-import hashlib
 import hmac
 import logging
 import re
 from typing import Any
 
-from github import GithubIntegration
+from github import GithubIntegration, GithubRetry
 
 from agentic_code_review.config import settings
 
+from ..constants import GITHUB_MAX_RETRIES, GITHUB_PER_PAGE, GITHUB_POOL_SIZE
+
 logger = logging.getLogger(__name__)
 
 # Constants to avoid hardcoding key markers in the code
@@ -46,7 +47,19 @@ class GitHubAuthenticator:
         try:
             logger.info(f"Initializing GitHub App integration with App ID: {app_id}")
             logger.info(f"Using GitHub API URL: {base_url}")
-            self.integration = GithubIntegration(int(app_id), formatted_key, base_url=base_url)
+            # Installation clients inherit these requester settings, so every
+            # client reuses pooled keep-alive connections to the API and pages
+            # through listings (PR files, review comments, ...) 100 items at a time.
+            # GithubRetry backs off on rate-limited responses, waiting for Retry-After
+            # or X-RateLimit-Reset, so concurrent fan-outs don't fail or retry in a storm.
+            self.integration = GithubIntegration(
+                int(app_id),
+                formatted_key,
+                base_url=base_url,
+                per_page=GITHUB_PER_PAGE,
+                pool_size=GITHUB_POOL_SIZE,
+                retry=GithubRetry(total=GITHUB_MAX_RETRIES),
+            )
             logger.info("GitHub App integration initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize GitHub App integration: {e}")
@@ -55,6 +68,8 @@ class GitHubAuthenticator:
             raise
 
         self.webhook_secret = webhook_secret
+        # Encoded once; the HMAC key is the same for every webhook delivery
+        self._webhook_secret_bytes = webhook_secret.encode()
 
     def _format_private_key(self, key: str) -> str:
         """
@@ -107,16 +122,13 @@ class GitHubAuthenticator:
             return False
 
         try:
-            sha_name, signature = signature_header.split("=")
+            sha_name, _, signature = signature_header.partition("=")
             if sha_name != "sha256":
                 return False
 
-            mac = hmac.new(
-                self.webhook_secret.encode(),
-                msg=payload_body,
-                digestmod=hashlib.sha256,
-            )
-            return hmac.compare_digest(mac.hexdigest(), signature)
+            # One-shot OpenSSL HMAC, compared in constant time
+            digest = hmac.digest(self._webhook_secret_bytes, payload_body, "sha256")
+            return hmac.compare_digest(digest.hex(), signature)
         except Exception as e:
             logger.error(f"Error verifying webhook signature: {e}")
             return False
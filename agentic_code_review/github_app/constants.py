@@ -4,3 +4,21 @@
 REVIEW_LABEL = "agentic-review"
 REFINE_LABEL = "agentic-refine"
 IN_PROGRESS_LABEL = "agentic-in-progress"
+
+# GitHub API client constants
+# Size of the keep-alive connection pool shared by requests to the GitHub API
+GITHUB_POOL_SIZE = 20
+# Page size for paginated REST listings (GitHub's maximum)
+GITHUB_PER_PAGE = 100
+# Maximum number of files the REST API lists for a single pull request
+GITHUB_MAX_PR_FILES = 3000
+# Attempts for requests hitting rate limits or server errors, with exponential backoff
+GITHUB_MAX_RETRIES = 5
+
+# Webhook constants
+# GitHub caps webhook payloads at 25 MB; larger request bodies are rejected
+MAX_WEBHOOK_PAYLOAD_SIZE = 25 * 1024 * 1024
+
+# Caching constants
+# Number of PR file listings kept across webhook events
+PR_FILES_CACHE_SIZE = 32
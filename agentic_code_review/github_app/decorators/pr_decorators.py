@@ -1,11 +1,13 @@
 """Decorators for GitHub Pull Request operations."""
 
+import asyncio
+import dataclasses
 import functools
 import inspect
 import logging
 
 from ..constants import IN_PROGRESS_LABEL
-from ..managers.pr_manager import PRContext
+from ..models import PRContext
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +55,7 @@ def with_pr_state_management(operation_name: str, operation_label: str, success_
                 context.installation_id,
                 context.repo,
                 context.pr_number,
+                context.current_labels,
                 True,
                 *args,
                 **kwargs,
@@ -69,6 +72,7 @@ def with_pr_state_management(operation_name: str, operation_label: str, success_
                 context.installation_id,
                 context.repo,
                 context.pr_number,
+                context.current_labels,
                 False,
                 *args,
                 **kwargs,
@@ -83,6 +87,7 @@ def with_pr_state_management(operation_name: str, operation_label: str, success_
             installation_id,
             repository,
             pr_number,
+            current_labels,
             is_async_wrapper,
             *args,
             **kwargs,
@@ -93,17 +98,23 @@ def with_pr_state_management(operation_name: str, operation_label: str, success_
                 installation_id=installation_id,
                 repo=repository,  # This is already a dict from the webhook payload
                 pr_number=pr_number,
+                current_labels=current_labels,
             )
             logger.info(f"Starting {operation_name} for PR #{pr_number}")
             success = False
 
+            # GitHub calls block, so they run in a worker thread to keep the
+            # shared event loop free for other operations
             try:
                 # Update PR state to in-progress
-                self.pr_manager.manage_labels(
+                await asyncio.to_thread(
+                    self.pr_manager.manage_labels,
                     context,
                     add_labels=[IN_PROGRESS_LABEL],
                     remove_labels=[operation_label],
                 )
+                # The payload's labels are stale now; later label changes re-read them
+                context = dataclasses.replace(context, current_labels=None)
 
                 # Execute the actual operation
                 if is_async_wrapper and inspect.iscoroutinefunction(func):
@@ -125,14 +136,14 @@ def with_pr_state_management(operation_name: str, operation_label: str, success_
                     f"Please add the {operation_name} label again to retry, "
                     "or contact support if the issue persists."
                 )
-                self.pr_manager.post_comment(context, error_msg)
+                await asyncio.to_thread(self.pr_manager.post_comment, context, error_msg)
                 raise
 
             finally:
                 # Clean up PR state
-                self.pr_manager.manage_labels(context, remove_labels=[IN_PROGRESS_LABEL])
+                await asyncio.to_thread(self.pr_manager.manage_labels, context, remove_labels=[IN_PROGRESS_LABEL])
                 if success:
-                    self.pr_manager.post_comment(context, success_message)
+                    await asyncio.to_thread(self.pr_manager.post_comment, context, success_message)
 
         # Return the appropriate wrapper based on whether the function is async
         return async_wrapper if is_async else sync_wrapper
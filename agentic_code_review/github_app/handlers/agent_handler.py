@@ -1,5 +1,6 @@
 """Agent operations handling."""
 
+import asyncio
 import logging
 
 from ...llm_refiner.llm_client import LLMClient
@@ -8,7 +9,8 @@ from ...llm_reviewer import LLMReviewer
 from ...models import FileToReview
 from ..constants import REFINE_LABEL, REVIEW_LABEL
 from ..decorators import with_pr_state_management
-from ..managers.pr_manager import PRContext, PRManager
+from ..managers.pr_manager import PRManager
+from ..models import PRContext
 
 logger = logging.getLogger(__name__)
 
@@ -39,9 +41,10 @@ class AgentHandler:
         Args:
             context: The PR context
         """
-        # Get PR files
+        # GitHub calls and diff parsing block, so they run in worker threads to keep
+        # the shared event loop free for other webhooks
         logger.info(f"Getting files for PR #{context.pr_number}")
-        files = self.pr_manager.get_pr_files(context)
+        files = await asyncio.to_thread(self.pr_manager.get_pr_files, context)
         logger.info(f"Found {len(files)} files in PR #{context.pr_number}")
 
         # Collect files for review
@@ -54,7 +57,7 @@ class AgentHandler:
 
             # Extract code diff units for better context
             logger.info(f"Extracting code diff units for {pr_file.filename}")
-            code_diff_units = self.pr_manager.extract_unique_code_diff_units(context, pr_file)
+            code_diff_units = await asyncio.to_thread(self.pr_manager.extract_unique_code_diff_units, context, pr_file)
 
             if not code_diff_units:
                 logger.info(f"No code diff units extracted from {pr_file.filename}, skipping review")
@@ -93,7 +96,8 @@ class AgentHandler:
             for comment in comments:
                 try:
                     logger.info(f"Posting review comment for {file_path} - Category: {comment.category}, Side: {comment.side}, Line: {comment.line_number}")
-                    self.pr_manager.post_review_comment(
+                    await asyncio.to_thread(
+                        self.pr_manager.post_review_comment,
                         context=context,
                         file_path=file_path,
                         line_number=comment.line_number,
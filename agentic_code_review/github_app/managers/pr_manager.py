@@ -5,25 +5,25 @@ including comment management and code analysis.
 """
 
 import logging
+import threading
 import time
-from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
 
 from github import PullRequest, PullRequestComment, Repository
 
-# Import the diff extractor and CodeDiffUnit
 from ...llm_refiner.diff_extractor import DiffExtractor
-
-# Remove imports from deprecated code_analysis
-# from ...code_analysis.code_analyzer import CodeAnalyzer
-# from ...code_analysis.language_config import LanguageRegistry
-# Import FileModification from the new location
 from ...llm_refiner.models import CodeDiffUnit
 from ..auth.authenticator import GitHubAuthenticator
-from ..constants import IN_PROGRESS_LABEL
+from ..constants import GITHUB_MAX_PR_FILES, GITHUB_PER_PAGE, IN_PROGRESS_LABEL, PR_FILES_CACHE_SIZE
 from ..models import PRComment, PRContext, PRFile
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for GitHub calls that can run ahead of (or alongside) the request thread
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pr-manager")
+
 
 class PRManager:
     """Manages GitHub pull request operations."""
@@ -36,29 +36,169 @@ class PRManager:
         """
         self.authenticator = authenticator
         # We'll get installation-specific clients as needed instead of a global client
-        # Remove the language registry initialization as it's no longer needed
-        # self.language_registry = LanguageRegistry()
-        # Cache for installation clients
-        self._installation_clients = {}
+        # Cache of installation clients, keyed by installation ID. Each entry is a
+        # future so a client that is still being prefetched is never created twice.
+        self._installation_clients: dict[int, Future] = {}
+        self._installation_clients_lock = threading.Lock()
+        # File content fetches in flight, keyed by (repo, path, ref), so concurrent
+        # webhooks for the same PR head share a single download
+        self._content_inflight: dict[tuple[str, str, str], Future] = {}
+        self._content_lock = threading.Lock()
+        # Pull requests fetched while handling the current webhook event, keyed by
+        # (installation ID, repo full name, PR number); see clear_pr_cache
+        self._pr_cache: dict[tuple[int, str, int], PullRequest] = {}
+        # Recently listed PR files, keyed by (repo full name, PR number, base SHA, head SHA).
+        # A PR's diff is fully determined by its two SHAs, so entries never go stale.
+        self._pr_files_cache: OrderedDict[tuple[str, int, str, str], list[PRFile]] = OrderedDict()
+        self._pr_files_lock = threading.Lock()
         # Initialize the DiffExtractor
         self._diff_extractor = DiffExtractor()
 
+    def prefetch(self, context: PRContext) -> Future:
+        """Start creating the installation client for a PR in the background.
+
+        Webhook handlers know the installation up front, so the installation token
+        exchange can overlap with the rest of the event handling instead of
+        delaying the first GitHub API call.
+
+        Args:
+            context: The PR context
+
+        Returns:
+            A future resolving to the installation client
+        """
+        return self._get_installation_client_future(context.installation_id)
+
+    def _get_installation_client_future(self, installation_id: int) -> Future:
+        """Get the cached installation client future, submitting it if needed.
+
+        Args:
+            installation_id: The GitHub App installation ID
+
+        Returns:
+            A future resolving to the installation client
+        """
+        with self._installation_clients_lock:
+            future = self._installation_clients.get(installation_id)
+            if future is None:
+                future = _EXECUTOR.submit(self._create_installation_client, installation_id)
+                self._installation_clients[installation_id] = future
+        return future
+
+    def _create_installation_client(self, installation_id: int) -> Any:
+        """Create an installation client and fetch its access token.
+
+        Args:
+            installation_id: The GitHub App installation ID
+
+        Returns:
+            The authenticated installation client
+        """
+        client = self.authenticator.get_installation_client(installation_id)
+        # Installation auth fetches (and later refreshes) its token lazily; touch it
+        # here so the exchange happens on the prefetch thread
+        auth = getattr(client.requester, "auth", None)
+        if auth is not None:
+            _ = auth.token
+        return client
+
+    def _get_installation_client(self, installation_id: int) -> Any:
+        """Get the installation client, waiting for a prefetch in flight.
+
+        Args:
+            installation_id: The GitHub App installation ID
+
+        Returns:
+            The authenticated installation client
+        """
+        future = self._get_installation_client_future(installation_id)
+        try:
+            return future.result()
+        except Exception:
+            # Drop the failed entry so the next call retries
+            with self._installation_clients_lock:
+                if self._installation_clients.get(installation_id) is future:
+                    del self._installation_clients[installation_id]
+            raise
+
     def _get_pr(self, context: PRContext) -> PullRequest:
         """Get a pull request by its context.
 
+        The pull request is memoized until clear_pr_cache is called, so the many
+        operations performed for one webhook event share a single fetch. Labels
+        change during an event and are therefore always read with get_labels.
+
         Args:
             context: The PR context containing repository and PR number
 
         Returns:
             The pull request if found, None otherwise
         """
-        client = self.authenticator.get_installation_client(context.installation_id)
-        repo = client.get_repo(context.repo["full_name"])
-        return repo.get_pull(context.pr_number)
+        key = self._pr_cache_key(context)
+        pr = self._pr_cache.get(key)
+        if pr is None:
+            client = self._get_installation_client(context.installation_id)
+            # The repository itself is never used, so don't fetch it
+            repo = client.get_repo(context.repo["full_name"], lazy=True)
+            pr = repo.get_pull(context.pr_number)
+            self._pr_cache[key] = pr
+        return pr
+
+    def clear_pr_cache(self, context: PRContext) -> None:
+        """Forget the memoized pull request for a PR context.
+
+        Call this once handling of a webhook event is complete.
+
+        Args:
+            context: The PR context
+        """
+        self._pr_cache.pop(self._pr_cache_key(context), None)
+
+    @staticmethod
+    def _pr_cache_key(context: PRContext) -> tuple[int, str, int]:
+        """Build the _get_pr cache key for a PR context."""
+        return (context.installation_id, context.repo["full_name"], context.pr_number)
 
     def get_file_content(self, repo: Repository, path: str, ref: str) -> Optional[str]:
         """Get the content of a file at a specific reference.
 
+        If the same file is already being fetched by another thread (e.g. a retried
+        webhook for the same PR), this waits for that fetch instead of issuing a
+        duplicate request.
+
+        Args:
+            repo: The GitHub repository
+            path: The path to the file
+            ref: The git reference (branch, commit, etc.)
+
+        Returns:
+            The file content if found, None otherwise
+        """
+        key = (repo.full_name, path, ref)
+        with self._content_lock:
+            inflight = self._content_inflight.get(key)
+            if inflight is None:
+                future: Future = Future()
+                self._content_inflight[key] = future
+
+        if inflight is not None:
+            logger.debug(f"Waiting for in-flight fetch of {path}@{ref}")
+            return inflight.result()
+
+        try:
+            content = self._fetch_file_content(repo, path, ref)
+            future.set_result(content)
+            return content
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._content_lock:
+                self._content_inflight.pop(key, None)
+
+    def _fetch_file_content(self, repo: Repository, path: str, ref: str) -> Optional[str]:
+        """Fetch the content of a file at a specific reference from GitHub.
+
         Args:
             repo: The GitHub repository
             path: The path to the file
@@ -88,50 +228,65 @@ class PRManager:
         """
         pr = self._get_pr(context)
 
-        # Get all review comments directly from PR and filter unresolved ones
+        # Get all review comments directly from PR (a single listing) and filter unresolved ones
+        review_comments = list(pr.get_review_comments())
+        implemented_ids = self._get_implemented_comment_ids(review_comments)
+
         comments = []
-        for comment in pr.get_review_comments():
-            if not self._is_comment_resolved_or_rejected(comment, pr):
+        for comment in review_comments:
+            if not self._is_comment_resolved_or_rejected(comment, implemented_ids):
                 comments.append(self._convert_to_pr_comment(comment))
 
         return comments
 
-    def _is_comment_resolved_or_rejected(self, comment: PullRequestComment, pr: PullRequest) -> bool:
+    def _get_implemented_comment_ids(self, review_comments: list[PullRequestComment]) -> set[int]:
+        """Find the comments that have a reply marking the suggestion as implemented.
+
+        Args:
+            review_comments: All review comments of the pull request
+
+        Returns:
+            IDs of the comments replied to with the implemented marker
+        """
+        implemented_ids = set()
+        for review_comment in review_comments:
+            # in_reply_to_id is None for top-level comments
+            if review_comment.in_reply_to_id is None:
+                continue
+            if review_comment.body.strip() == "✅ This suggestion has been implemented":
+                implemented_ids.add(review_comment.in_reply_to_id)
+            else:
+                logger.debug(f"Reply body: {review_comment.body}")
+        return implemented_ids
+
+    def _is_comment_resolved_or_rejected(self, comment: PullRequestComment, implemented_ids: set[int]) -> bool:
         """Check if a pull request comment is resolved or rejected.
 
+        The checks that need no API call run first, so the reactions are only
+        fetched for comments that still look unresolved.
+
         Args:
             comment: The GitHub PullRequestComment object
-            pr: The PullRequest object
+            implemented_ids: IDs of comments marked as implemented via reply
 
         Returns:
             bool: True if resolved or rejected, False otherwise
         """
         try:
-            # Check for thumbs down reaction (rejected by reviewer)
-            if any(reaction.content == "-1" for reaction in comment.get_reactions()):
-                logger.debug(f"Comment {comment.id} has been rejected (thumbs down)")
-                return True
-
             # Check if comment is outdated (position is None indicates resolution)
             if comment.position is None:
                 logger.debug(f"Comment {comment.id} appears to be outdated (position is None)")
                 return True
 
             # Check for replies that indicate the suggestion was implemented
-            try:
-                # Get all review comments and filter for those that are in reply to this comment
-                comment_id = comment.id
-                for review_comment in pr.get_review_comments():
-                    # Check directly if this comment is a reply to our comment
-                    # in_reply_to_id is None for top-level comments
-                    if review_comment.in_reply_to_id == comment_id:
-                        if review_comment.body.strip() == "✅ This suggestion has been implemented":
-                            logger.info(f"Comment {comment_id} marked as implemented via reply")
-                            return True
-                        else:
-                            logger.debug(f"Reply body: {review_comment.body}")
-            except Exception as e:
-                logger.warning(f"Error checking comment replies: {e}")
+            if comment.id in implemented_ids:
+                logger.info(f"Comment {comment.id} marked as implemented via reply")
+                return True
+
+            # Check for thumbs down reaction (rejected by reviewer)
+            if any(reaction.content == "-1" for reaction in comment.get_reactions()):
+                logger.debug(f"Comment {comment.id} has been rejected (thumbs down)")
+                return True
 
             return False
         except Exception as e:
@@ -147,10 +302,12 @@ class PRManager:
         Returns:
             A PRComment instance
         """
-        # Extract category from markdown if present, otherwise use a default
+        # Extract category from the "# {category} - {severity}" heading if present,
+        # otherwise use a default. Only the heading line is scanned, not the whole body.
         category = "General"
         if comment.body and comment.body.startswith("#"):
-            category = comment.body.split("\n")[0].strip("# ").split(" - ")[0]
+            heading = comment.body.partition("\n")[0]
+            category = heading.strip("# ").partition(" - ")[0]
 
         return PRComment(
             id=comment.id,
@@ -162,29 +319,6 @@ class PRManager:
             code_context=None,  # Will be populated later
         )
 
-    def _get_code_context(self, context_nodes: list["CodeNode"], content: str) -> str:
-        """Get the code context from a list of context nodes.
-
-        Args:
-            context_nodes: List of nodes in the context chain
-            content: The full file content
-
-        Returns:
-            A string representation of the code context
-        """
-        if not context_nodes:
-            return ""
-
-        # Get the code for each node in the context
-        context_parts = []
-        for node in context_nodes:
-            if node.name:
-                context_parts.append(f"{node.node_type}: {node.name}")
-            else:
-                context_parts.append(node.node_type)
-
-        return " > ".join(context_parts)
-
     def post_comment(self, context: PRContext, message: str) -> None:
         """Post a general comment on a pull request.
 
@@ -265,6 +399,11 @@ class PRManager:
     ) -> bool:
         """Manage labels on a pull request.
 
+        The additions and removals are applied in a single request that replaces
+        the full label set, so the PR never ends up with only half of the change.
+        When the context carries the labels from the webhook payload they are used
+        as the current set, saving the request that lists them.
+
         Args:
             context: The PR context
             add_labels: List of labels to add
@@ -275,20 +414,16 @@ class PRManager:
         """
         try:
             pr = self._get_pr(context)
-            # Get current labels
-            current_labels = {label.name for label in pr.labels}
-
-            # Add new labels
-            if add_labels:
-                for label in add_labels:
-                    if label not in current_labels:
-                        pr.add_to_labels(label)
+            # Get current labels (fresh, since the memoized PR may predate label changes)
+            if context.current_labels is not None:
+                current_labels = set(context.current_labels)
+            else:
+                current_labels = {label.name for label in pr.get_labels()}
+            desired_labels = (current_labels | set(add_labels or [])) - set(remove_labels or [])
 
-            # Remove specified labels
-            if remove_labels:
-                for label in remove_labels:
-                    if label in current_labels:
-                        pr.remove_from_labels(label)
+            # PUT /issues/{number}/labels replaces the whole set in one round trip
+            if desired_labels != current_labels:
+                pr.set_labels(*sorted(desired_labels))
 
             return True
         except Exception as e:
@@ -307,15 +442,33 @@ class PRManager:
         try:
             pr = self._get_pr(context)
             # Check for in-progress label
-            current_labels = {label.name for label in pr.labels}
+            current_labels = {label.name for label in pr.get_labels()}
             return IN_PROGRESS_LABEL in current_labels
         except Exception as e:
             logger.error(f"Failed to check PR status: {e}")
             return False
 
+    @staticmethod
+    def is_in_progress_from_payload(labels: list[dict[str, Any]]) -> bool:
+        """Check if a PR is being processed using the labels of a webhook payload.
+
+        Pull request and issue payloads carry the current labels, so this avoids
+        the API round trip made by is_in_progress.
+
+        Args:
+            labels: The "labels" list of the pull request or issue payload
+
+        Returns:
+            True if the PR is being processed, False otherwise
+        """
+        return any(label.get("name") == IN_PROGRESS_LABEL for label in labels)
+
     def get_pr_files(self, context: PRContext) -> list[PRFile]:
         """Get all files changed in a pull request.
 
+        Listings are cached by the PR's base and head SHAs, so repeated events on
+        an unchanged PR (e.g. review followed by refine) skip the API entirely.
+
         Args:
             context: The PR context
 
@@ -324,26 +477,77 @@ class PRManager:
         """
         try:
             pr = self._get_pr(context)
-            files = []
-
-            for file in pr.get_files():
-                pr_file = PRFile(
-                    filename=file.filename,
-                    patch=file.patch,
-                    status=file.status,
-                    additions=file.additions,
-                    deletions=file.deletions,
-                    changes=file.changes,
-                    previous_filename=file.previous_filename if hasattr(file, "previous_filename") else None,
-                )
-                files.append(pr_file)
+            # The memoized PR already carries both SHAs, so checking the cache is free
+            key = (context.repo["full_name"], context.pr_number, pr.base.sha, pr.head.sha)
+            with self._pr_files_lock:
+                cached = self._pr_files_cache.get(key)
+                if cached is not None:
+                    self._pr_files_cache.move_to_end(key)
+            if cached is not None:
+                logger.info(f"Using cached files for PR #{context.pr_number} at {pr.head.sha[:7]}")
+                return list(cached)
+
+            files = [self._convert_to_pr_file(file.raw_data) for file in self._list_pr_files(pr)]
+
+            with self._pr_files_lock:
+                self._pr_files_cache[key] = files
+                self._pr_files_cache.move_to_end(key)
+                while len(self._pr_files_cache) > PR_FILES_CACHE_SIZE:
+                    self._pr_files_cache.popitem(last=False)
 
             logger.info(f"Fetched {len(files)} files from PR #{context.pr_number}")
-            return files
+            return list(files)
         except Exception as e:
             logger.error(f"Failed to fetch files for PR #{context.pr_number}: {e}")
             raise
 
+    @staticmethod
+    def _convert_to_pr_file(raw: dict[str, Any]) -> PRFile:
+        """Convert a file entry of the GitHub PR files response to our PRFile model.
+
+        Reads the decoded JSON directly instead of going through the PyGithub
+        File attribute wrappers.
+
+        Args:
+            raw: The file's raw JSON data
+
+        Returns:
+            A PRFile instance
+        """
+        return PRFile(
+            filename=raw["filename"],
+            # GitHub omits the patch for binary and very large diffs
+            patch=raw.get("patch"),
+            status=raw["status"],
+            additions=raw["additions"],
+            deletions=raw["deletions"],
+            changes=raw["changes"],
+            previous_filename=raw.get("previous_filename"),
+        )
+
+    def _list_pr_files(self, pr: PullRequest) -> list:
+        """List the files of a pull request, fetching all pages concurrently.
+
+        The PR already reports how many files it changes, so the number of pages
+        is known up front and pages 2..N don't have to wait for the previous
+        page's Link header.
+
+        Args:
+            pr: The pull request
+
+        Returns:
+            List of PyGithub File objects
+        """
+        paginated_files = pr.get_files()
+        file_count = min(pr.changed_files, GITHUB_MAX_PR_FILES)
+        page_count = max(1, -(-file_count // GITHUB_PER_PAGE))
+        if page_count == 1:
+            return list(paginated_files)
+
+        logger.debug(f"Fetching {page_count} pages of files for PR #{pr.number} concurrently")
+        pages = _EXECUTOR.map(paginated_files.get_page, range(page_count))
+        return [file for page in pages for file in page]
+
     def _create_refinement_branch(self, repo: Repository, original_branch: str, original_sha: str) -> Optional[str]:
         """Create a new refinement branch from the original branch.
 
@@ -639,13 +843,15 @@ class PRManager:
             # Get the PR and fetch necessary content
             pr = self._get_pr(context)
 
-            # Get file content before/after changes as needed
-            before_content = None
-            after_content = None
+            # Get file content before/after changes as needed. The two fetches are
+            # independent, so they run concurrently and cost a single round trip.
+            before_future = None
+            after_future = None
 
             # Only get before content if file wasn't added
             if pr_file.status != "added":
-                before_content = self.get_file_content(
+                before_future = _EXECUTOR.submit(
+                    self.get_file_content,
                     repo=pr.base.repo,
                     path=pr_file.filename,
                     ref=pr.base.ref
@@ -653,12 +859,16 @@ class PRManager:
 
             # Only get after content if file wasn't removed
             if pr_file.status != "removed":
-                after_content = self.get_file_content(
+                after_future = _EXECUTOR.submit(
+                    self.get_file_content,
                     repo=pr.head.repo,
                     path=pr_file.filename,
                     ref=pr.head.ref
                 )
 
+            before_content = before_future.result() if before_future else None
+            after_content = after_future.result() if after_future else None
+
             # Extract all unique code units
             return self._diff_extractor.collect_unique_units_from_pr_file(
                 pr_file=pr_file,
@@ -1,22 +1,26 @@
 """Models for GitHub integration.
 
 This module contains data models used throughout the GitHub integration.
+The models are slotted dataclasses since a single PR can allocate hundreds of
+them; PRComment stays mutable because its code context is populated later.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PRContext:
     """Context for PR operations."""
 
     repo: dict[str, Any]
     pr_number: int
     installation_id: int
+    # Label names from the webhook payload, valid until the PR's labels are first changed
+    current_labels: Optional[frozenset[str]] = field(default=None, compare=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class PRComment:
     """Represents a review comment on a pull request."""
 
@@ -34,7 +38,7 @@ class PRComment:
     node_name: Optional[str] = None  # Name of code node if applicable
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PRFile:
     """Represents a file in a pull request."""
 
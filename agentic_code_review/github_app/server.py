@@ -5,20 +5,30 @@ handling webhook events and GitHub API interactions.
 """
 
 import asyncio
+import json
 import logging
+import threading
+from collections.abc import Coroutine
 from typing import Any
 
+import uvicorn
 from flask import Flask, request
 
 from agentic_code_review.config import settings
+from agentic_code_review.utils.logging import setup_logging
 
 from .auth.authenticator import GitHubAuthenticator
+from .constants import MAX_WEBHOOK_PAYLOAD_SIZE, REFINE_LABEL, REVIEW_LABEL
 from .handlers.agent_handler import AgentHandler
-from .managers.pr_manager import PRContext, PRManager
+from .managers.pr_manager import PRManager
+from .models import PRContext
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Labels that trigger an agent; labeled events for any other label are ignored
+TRIGGER_LABELS = frozenset({REVIEW_LABEL, REFINE_LABEL})
+
 
 class GitHubApp:
     """GitHub App server implementation."""
@@ -35,17 +45,26 @@ class GitHubApp:
         self.pr_manager = PRManager(self.authenticator)
         self.agent_handler = AgentHandler(self.pr_manager)
 
+        # One long-lived event loop runs all agent coroutines, so webhooks don't pay
+        # for loop setup/teardown and loop-bound clients survive across events. The
+        # coroutines hand their blocking GitHub and tree-sitter calls to worker threads,
+        # so webhooks handled by different request threads still run concurrently.
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, name="agent-event-loop", daemon=True)
+        self._loop_thread.start()
+
         self.app = Flask(__name__)
+        self.app.config["MAX_CONTENT_LENGTH"] = MAX_WEBHOOK_PAYLOAD_SIZE
 
         # Add request logger
         @self.app.before_request
         def log_request_info() -> None:
+            # Health checks are frequent and not worth logging
+            if request.path == "/":
+                return
             logger.info("⭐️ NEW REQUEST RECEIVED ⭐️")
             logger.info(f"Path: {request.path}")
             logger.info(f"Method: {request.method}")
-            # logger.info(f"Headers: {dict(request.headers)}")
-            # if request.data:
-            #     logger.info(f"Data: {request.data.decode()}")
 
         self.setup_routes()
 
@@ -67,39 +86,40 @@ class GitHubApp:
         """Handle incoming webhook events."""
         try:
             logger.info("🔔 Received webhook request")
-            # logger.info("📋 Headers:")
-            # for key, value in request.headers.items():
-            #     logger.info(f"  {key}: {value}")
 
             signature = request.headers.get("X-Hub-Signature-256")
-            payload_data = request.get_data()
-
-            # logger.info("📦 Payload data:")
-            # try:
-            #     payload_str = payload_data.decode()
-            #     logger.info(f"  {payload_str}")
-            # except Exception as e:
-            #     logger.error(f"Failed to decode payload: {e}")
+            # The body is read exactly once: the raw bytes are verified and then decoded
+            payload_data = request.get_data(cache=False)
 
             # Verify webhook signature
             if signature is None or not self.authenticator.verify_webhook_signature(payload_data, signature):
                 logger.error("❌ Invalid webhook signature")
                 return {"error": "Invalid signature", "status": "error"}, 401  # type: ignore
 
-            # Process based on event type
+            # Process based on event type; other events are dropped without decoding the body
             event_type = request.headers.get("X-GitHub-Event")
             logger.info(f"📣 Event type: {event_type}")
+            if event_type not in ("pull_request", "issues"):
+                logger.info(f"Ignoring event type: {event_type}")
+                return {"status": "ignored"}
 
-            payload = request.get_json()
+            payload = json.loads(payload_data)
             action = payload.get("action")
             logger.info(f"Action: {action}")
 
-            # Handle both direct label events and pull request events
-            if event_type in ["pull_request", "issues"] and action == "labeled":
-                logger.info("Label added event detected")
-                self._handle_labeled_event(payload)
-            else:
+            # Handle both direct label events and pull request events, but only for
+            # the labels we act on; every other label change in the repo is noise
+            if action != "labeled":
                 logger.info(f"Ignoring event type: {event_type} with action: {action}")
+                return {"status": "ignored"}
+
+            label_name = payload.get("label", {}).get("name")
+            if label_name not in TRIGGER_LABELS:
+                logger.info(f"⏭️ Ignoring non-matching label: {label_name}")
+                return {"status": "ignored"}
+
+            logger.info("Label added event detected")
+            self._handle_labeled_event(payload)
 
             return {"status": "success"}
         except Exception as e:
@@ -108,6 +128,7 @@ class GitHubApp:
 
     def _handle_labeled_event(self, payload: dict[str, Any]) -> None:
         """Handle labeled events from both PRs and issues."""
+        pr_context: PRContext | None = None
         try:
             logger.info("🏷️ Processing labeled event")
 
@@ -131,42 +152,74 @@ class GitHubApp:
                 logger.error(f"Installation ID: {installation_id}")
                 return
 
+            # The payload carries the PR's current labels; only ask the API if it doesn't
+            labels = pr_data.get("labels")
+
             # Create PR context
             pr_context = PRContext(
                 installation_id=int(installation_id) if installation_id else 0,
                 repo=repository,
                 pr_number=int(pr_number) if pr_number else 0,
+                current_labels=frozenset(label["name"] for label in labels) if labels is not None else None,
             )
 
-            if self.pr_manager.is_in_progress(pr_context):
+            # Warm the installation client while the rest of the event is handled
+            self.pr_manager.prefetch(pr_context)
+
+            if labels is not None:
+                in_progress = self.pr_manager.is_in_progress_from_payload(labels)
+            else:
+                in_progress = self.pr_manager.is_in_progress(pr_context)
+
+            if in_progress:
                 msg = "⏳ This PR is currently being processed. Please wait for the current operation to complete."
                 logger.info("⚠️ PR is already being processed")
                 self.pr_manager.post_comment(pr_context, msg)
                 return
 
-            # Create event loop for async operations
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            try:
-                # Pass to the appropriate handler based on label
-                if label_name == "agentic-review":
-                    loop.run_until_complete(
-                        self.agent_handler.handle_review(pr_context)
-                    )
-                elif label_name == "agentic-refine":
-                    loop.run_until_complete(
-                        self.agent_handler.handle_refinement(pr_context)
-                    )
-                else:
-                    logger.info(f"⏭️ Ignoring non-matching label: {label_name}")
-            finally:
-                loop.close()
+            # Pass to the appropriate handler based on label; _handle_webhook only
+            # forwards events for TRIGGER_LABELS
+            if label_name == REVIEW_LABEL:
+                self._run_on_loop(self.agent_handler.handle_review(pr_context))
+            elif label_name == REFINE_LABEL:
+                self._run_on_loop(self.agent_handler.handle_refinement(pr_context))
 
         except Exception:
             logger.exception("❌ Error handling labeled event:")
+        finally:
+            if pr_context is not None:
+                self.pr_manager.clear_pr_cache(pr_context)
+
+    def _run_on_loop(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Run a coroutine on the app's event loop and wait for its result.
+
+        Args:
+            coro: The coroutine to run
+
+        Returns:
+            The coroutine's result
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return future.result()
 
     def run(self, host: str = "0.0.0.0", port: int = 3000) -> None:
-        """Run the GitHub App server."""
-        # Enable Flask development mode
-        self.app.run(host=host, port=port, debug=True)
+        """Run the GitHub App server.
+
+        The Flask app is served by uvicorn through its WSGI interface, which hands
+        requests to a thread pool instead of Werkzeug's development server.
+        """
+        uvicorn.run(self.app, host=host, port=port, interface="wsgi")
+
+
+def create_app() -> Flask:
+    """Create the Flask application for a server worker process.
+
+    Used as the uvicorn app factory so every worker builds its own GitHubApp.
+
+    Returns:
+        The Flask application handling the webhook routes
+    """
+    # Spawned worker processes don't inherit the logging set up by the entry point
+    if not logging.getLogger("agentic_code_review").handlers:
+        setup_logging(level="DEBUG" if settings.DEBUG else settings.LOG_LEVEL)
+    return GitHubApp().app
@@ -16,7 +16,6 @@ from .models import (
     RefinementResponse,
     SkippedSuggestion,
 )
-from .refinement_agent import RefinementAgent
 
 __all__ = [
     "ContextExtractor",
@@ -30,4 +29,14 @@ __all__ = [
     "RefinementResponse",
     "SkippedSuggestion",
     "RefinementAgent",
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    # The refinement agent depends on the GitHub PR manager, which imports this
+    # package's diff extractor; loading it on first use keeps the import acyclic
+    if name == "RefinementAgent":
+        from .refinement_agent import RefinementAgent
+
+        return RefinementAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
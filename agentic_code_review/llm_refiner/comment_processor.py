@@ -5,21 +5,34 @@ to prepare them for refinement.
 """
 
 import logging
-from typing import Dict, List, Optional, Set, Tuple
-from tree_sitter import Node
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 
 from agentic_code_review.github_app.models import PRComment
 from .context_extractor import ContextExtractor
 
 logger = logging.getLogger(__name__)
 
+# Long-lived pool for grouping comments of several files in parallel. The context
+# extractor's parsers are per thread, so reusing the threads reuses the parsers.
+_EXECUTOR = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="comment-grouping")
+
 
 class CommentProcessor:
     """Process and group PR comments for refinement."""
 
-    def __init__(self):
-        """Initialize the comment processor."""
-        pass
+    def __init__(self, context_extractor: Optional[ContextExtractor] = None):
+        """Initialize the comment processor.
+
+        Args:
+            context_extractor: Extractor to share with the caller, so parsers and
+                parse trees are reused across files and calls; a new one is
+                created if omitted
+        """
+        self.context_extractor = context_extractor or ContextExtractor()
 
     def group_comments_by_file(self, comments: List[PRComment]) -> Dict[str, List[PRComment]]:
         """Group comments by their file path.
@@ -30,14 +43,12 @@ class CommentProcessor:
         Returns:
             Dictionary mapping file paths to their comments
         """
-        file_comments: Dict[str, List[PRComment]] = {}
-        
+        file_comments: Dict[str, List[PRComment]] = defaultdict(list)
+
         for comment in comments:
-            if comment.path not in file_comments:
-                file_comments[comment.path] = []
             file_comments[comment.path].append(comment)
-            
-        return file_comments
+
+        return dict(file_comments)
         
     def group_comments_by_proximity(self, comments: List[PRComment], proximity_threshold: int = 10) -> List[List[PRComment]]:
         """Group comments by their proximity in the file.
@@ -55,24 +66,27 @@ class CommentProcessor:
         if not comments:
             return []
             
-        # Sort comments by line number
-        sorted_comments = sorted(comments, key=lambda c: c.line_number)
+        # Sort comments by line number (attrgetter keeps the key extraction in C)
+        sorted_comments = sorted(comments, key=attrgetter("line_number"))
         
         # Initialize groups
-        groups: List[List[PRComment]] = [[sorted_comments[0]]]
+        current_group = [sorted_comments[0]]
+        groups: List[List[PRComment]] = [current_group]
+        last_line = sorted_comments[0].line_number
         
         # Group comments based on proximity
         for comment in sorted_comments[1:]:
-            last_group = groups[-1]
-            last_comment = last_group[-1]
+            line_number = comment.line_number
             
             # If the comment is within the proximity threshold of the last comment in the group,
-            # add it to the same group
-            if abs(comment.line_number - last_comment.line_number) <= proximity_threshold:
-                last_group.append(comment)
+            # add it to the same group (lines are sorted, so the distance is never negative)
+            if line_number - last_line <= proximity_threshold:
+                current_group.append(comment)
             else:
                 # Start a new group
-                groups.append([comment])
+                current_group = [comment]
+                groups.append(current_group)
+            last_line = line_number
                 
         return groups
         
@@ -93,40 +107,101 @@ class CommentProcessor:
         if not comments:
             return []
             
-        # Create a context extractor
-        context_extractor = ContextExtractor()
+        # Extract the context of every commented line with a single parse of the file
+        line_contexts = self.context_extractor.extract_contexts_for_lines(
+            file_path, file_content, [comment.line_number for comment in comments]
+        )
         
         # Map for tracking which code unit each comment belongs to
         # We'll use the code unit's start line and end line as its identifier
-        unit_to_comments: Dict[Optional[Tuple[int, int]], List[PRComment]] = {}
+        unit_to_comments: Dict[Optional[Tuple[int, int]], List[PRComment]] = defaultdict(list)
         
-        # Assign each comment to its containing code unit
-        for comment in comments:
-            # Extract context for this comment line
-            context_result = context_extractor.extract_context(file_path, file_content, comment.line_number)
+        # Assign each comment to its containing code unit. Comments are visited in
+        # line order, so every group comes out already sorted by line number.
+        for comment in sorted(comments, key=attrgetter("line_number")):
+            code_context = line_contexts.get(comment.line_number)
             
-            if context_result:
+            if code_context:
                 # If we found a context, use the code unit's range as identifier
-                _, code_context = context_result
                 unit_id = (code_context.start_line, code_context.end_line)
             else:
                 # If no context found, use None as the identifier
                 unit_id = None
-            
-            if unit_id not in unit_to_comments:
-                unit_to_comments[unit_id] = []
                 
             unit_to_comments[unit_id].append(comment)
         
         # Convert the dictionary to a list of lists
-        result = list(unit_to_comments.values())
-        
-        # Sort each group by line number
-        for group in result:
-            group.sort(key=lambda c: c.line_number)
-            
-        return result
+        return list(unit_to_comments.values())
     
+    def group_comments_by_code_unit_multi(
+        self, file_comments: Dict[str, List[PRComment]], file_contents: Dict[str, str]
+    ) -> Dict[str, List[List[PRComment]]]:
+        """Group the comments of several files by code unit, parsing the files in parallel.
+
+        Files are independent, so each one is grouped on a worker thread; the
+        shared context extractor gives every thread its own parsers and keeps the
+        resulting trees for later context extraction.
+
+        Args:
+            file_comments: Dictionary mapping file paths to their comments
+            file_contents: Dictionary mapping file paths to their content
+
+        Returns:
+            Dictionary mapping file paths to their comment groups, as returned by
+            group_comments_by_code_unit; files whose grouping failed are left out
+        """
+        paths = list(file_comments)
+        if len(paths) <= 1:
+            groups = [self._group_file_comments(path, file_comments[path], file_contents[path]) for path in paths]
+        else:
+            groups = list(_EXECUTOR.map(
+                lambda path: self._group_file_comments(path, file_comments[path], file_contents[path]),
+                paths,
+            ))
+        return {path: file_groups for path, file_groups in zip(paths, groups, strict=True) if file_groups is not None}
+
+    def _group_file_comments(self, file_path: str, comments: List[PRComment], file_content: str) -> Optional[List[List[PRComment]]]:
+        """Group one file's comments by code unit, containing any failure to that file.
+
+        Args:
+            file_path: Path to the file
+            comments: The file's comments
+            file_content: Content of the file
+
+        Returns:
+            The comment groups, or None if grouping failed
+        """
+        try:
+            return self.group_comments_by_code_unit(comments, file_content, file_path)
+        except Exception as e:
+            logger.error(f"Failed to group comments for {file_path}: {e}")
+            return None
+
+    def group_all(self, comments: List[PRComment], file_contents: Mapping[str, Optional[str]]) -> Dict[str, List[List[PRComment]]]:
+        """Group comments by file and, within each file, by code unit.
+
+        Comments are bucketed by file in a single pass and each bucket goes
+        straight to the parallel code-unit grouping.
+
+        Args:
+            comments: List of comments to group
+            file_contents: Mapping of file paths to their content; files without
+                content are left out of the result
+
+        Returns:
+            Dictionary mapping file paths to their comment groups, as returned by
+            group_comments_by_code_unit; files whose grouping failed are left out
+        """
+        file_comments: Dict[str, List[PRComment]] = defaultdict(list)
+        contents: Dict[str, str] = {}
+        for comment in comments:
+            content = file_contents.get(comment.path)
+            if content:
+                file_comments[comment.path].append(comment)
+                contents[comment.path] = content
+
+        return self.group_comments_by_code_unit_multi(file_comments, contents)
+
     def group_comments_by_context(self, comments: List[PRComment], node_mapping: Dict[int, Set[int]]) -> Dict[int, List[PRComment]]:
         """Group comments by their code context using node mapping.
 
@@ -4,9 +4,11 @@ This module provides functionality for extracting relevant code context
 from source files using tree-sitter in a language-agnostic way.
 """
 
+import functools
 import logging
+import threading
+from collections import OrderedDict
 from typing import Optional, Dict, Any, Tuple, List
-import os
 
 from tree_sitter import Parser, Language, Tree, Node
 from tree_sitter_language_pack import get_language, get_parser
@@ -15,15 +17,164 @@ from .models import CodeContext
 
 logger = logging.getLogger(__name__)
 
+# Number of parse trees kept by each ContextExtractor
+TREE_CACHE_SIZE = 64
+# Number of split files kept by each ContextExtractor
+LINES_CACHE_SIZE = 16
+
+# Simple mapping of file extensions to tree-sitter language identifiers
+_EXTENSION_MAP = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.java': 'java',
+    '.c': 'c',
+    '.cpp': 'cpp',
+    '.h': 'c',
+    '.hpp': 'cpp',
+    '.go': 'go',
+    '.rb': 'ruby',
+    '.rs': 'rust',
+    '.php': 'php',
+    '.cs': 'c_sharp',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.scala': 'scala',
+    '.html': 'html',
+    '.json': 'json',
+    '.md': 'markdown',
+}
+
+# Substrings of node types that mark a definition (function, method, class, ...)
+_DEFINITION_INDICATORS = ('function', 'method', 'class', 'def', 'procedure')
+
+# Line prefixes of import statements per language, as tuples for str.startswith
+_IMPORT_INDICATORS = {
+    'python': ('import ', 'from '),
+    'javascript': ('import ', 'require('),
+    'typescript': ('import ', 'require('),
+    'java': ('import ',),
+    'rust': ('use ',),
+    'go': ('import ',),
+}
+
+
+@functools.lru_cache(maxsize=2048)
+def _is_definition_type(node_type: str) -> bool:
+    """Check whether a node type suggests a definition (function, method, class, ...).
+
+    A grammar only has a few hundred node types, so each one is classified once
+    per process instead of once per visited node.
+    """
+    node_type = node_type.lower()
+    return any(indicator in node_type for indicator in _DEFINITION_INDICATORS)
+
+
+@functools.lru_cache(maxsize=1024)
+def _language_for_path(file_path: str) -> Optional[str]:
+    """Map a file path to its tree-sitter language identifier by extension."""
+    return _EXTENSION_MAP.get(_get_extension(file_path).lower())
+
+
+def _get_extension(file_path: str) -> str:
+    """Get the extension of a repository path, including the dot.
+
+    Same result as os.path.splitext(file_path)[1] for the '/'-separated paths
+    GitHub uses (leading dots of a file name don't start an extension), without
+    its generic path handling.
+    """
+    dot = file_path.rfind('.')
+    name_start = file_path.rfind('/') + 1
+    if dot > name_start and file_path[name_start:dot].lstrip('.'):
+        return file_path[dot:]
+    return ''
+
+
+class FileIndex:
+    """A file parsed once for resolving the code context of many of its lines.
+
+    Built by ContextExtractor.build_index. Lookups share one ancestor memo, so
+    lines inside the same code unit only evaluate their common ancestors once.
+    """
+
+    def __init__(
+        self,
+        extractor: 'ContextExtractor',
+        file_path: str,
+        file_content: str,
+        parsed: Optional[Tuple[Tree, bytes]],
+    ):
+        """Initialize the index.
+
+        Args:
+            extractor: The extractor that parsed the file
+            file_path: Path to the file
+            file_content: Content of the file
+            parsed: Tuple of (tree, utf8_source), or None if the file could not be parsed
+        """
+        self._extractor = extractor
+        self.file_path = file_path
+        self._file_content = file_content
+        self._parsed = parsed
+        self._unit_memo: Dict[int, Tuple[Optional[Node], Optional[Node]]] = {}
+
+    def lookup(self, line: int) -> Optional[Tuple[str, CodeContext]]:
+        """Extract code context for a specific line.
+
+        Gives the same result as ContextExtractor.extract_context for this file.
+
+        Args:
+            line: Line number (1-based)
+
+        Returns:
+            Tuple of (code_text, code_context) or None if extraction failed
+        """
+        if not self._parsed:
+            return self._extractor._fallback_context_extraction(self._file_content, line, self.file_path)
+
+        return self._extractor._extract_context_from_tree(
+            self._parsed, self.file_path, self._file_content, line, self._unit_memo)
+
 
 class ContextExtractor:
     """Extract code context using tree-sitter in a language-agnostic way."""
     
-    def __init__(self):
-        """Initialize the context extractor."""
-        self._parsers: Dict[str, Parser] = {}
+    def __init__(self, tree_cache_size: int = TREE_CACHE_SIZE, lines_cache_size: int = LINES_CACHE_SIZE):
+        """Initialize the context extractor.
+
+        Args:
+            tree_cache_size: Maximum number of parse trees kept (LRU)
+            lines_cache_size: Maximum number of split files kept (LRU)
+        """
+        self._tree_cache_size = tree_cache_size
+        self._lines_cache_size = lines_cache_size
+        # Parsers are not thread-safe, so each thread gets its own; see _get_parser
+        self._thread_state = threading.local()
         self._languages: Dict[str, Language] = {}
-        
+        # LRU of parse trees, with the UTF-8 source they were parsed from, keyed by
+        # (language, source). A PR's files are parsed once per hunk or comment, often
+        # interleaved, so a single slot isn't enough. Keying on the source itself
+        # means a changed file can never hit a stale tree.
+        self._tree_cache: OrderedDict[Tuple[str, str], Tuple[Tree, bytes]] = OrderedDict()
+        # The extractor owned by PRManager is shared by concurrent webhook threads
+        self._tree_cache_lock = threading.Lock()
+        # LRU of file contents split into lines, keyed by the content like the trees
+        self._lines_cache: OrderedDict[str, List[str]] = OrderedDict()
+        self._lines_cache_lock = threading.Lock()
+        
+    def close(self) -> None:
+        """Release the cached parse trees, split files and the calling thread's parsers.
+
+        The extractor stays usable; caches are simply rebuilt on demand.
+        """
+        with self._tree_cache_lock:
+            self._tree_cache.clear()
+        with self._lines_cache_lock:
+            self._lines_cache.clear()
+        self._thread_state.parsers = {}
+
     def _detect_language(self, file_path: str) -> Optional[str]:
         """Detect the language based on file extension.
         
@@ -33,36 +184,11 @@ class ContextExtractor:
         Returns:
             Language identifier compatible with tree-sitter, or None if not detected
         """
-        _, ext = os.path.splitext(file_path.lower())
-        
-        # Simple mapping of file extensions to tree-sitter language identifiers
-        extension_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.jsx': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            '.java': 'java',
-            '.c': 'c',
-            '.cpp': 'cpp',
-            '.h': 'c',
-            '.hpp': 'cpp',
-            '.go': 'go',
-            '.rb': 'ruby',
-            '.rs': 'rust',
-            '.php': 'php',
-            '.cs': 'c_sharp',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-            '.scala': 'scala',
-            '.html': 'html',
-            '.json': 'json',
-            '.md': 'markdown',
-        }
-        
-        if ext in extension_map:
-            return extension_map[ext]
-            
+        language_id = _language_for_path(file_path)
+        if language_id:
+            return language_id
+
+        ext = _get_extension(file_path).lower()
         logger.warning(f"Could not detect language for file extension: {ext}")
         return None
         
@@ -89,7 +215,7 @@ class ContextExtractor:
         return None
         
     def _get_parser(self, language_id: str) -> Optional[Parser]:
-        """Get a parser for the specified language.
+        """Get the calling thread's parser for the specified language.
         
         Args:
             language_id: The language identifier
@@ -97,14 +223,18 @@ class ContextExtractor:
         Returns:
             A configured Parser instance, or None if language is not available
         """
-        if language_id in self._parsers:
-            return self._parsers[language_id]
+        parsers: Optional[Dict[str, Parser]] = getattr(self._thread_state, "parsers", None)
+        if parsers is None:
+            parsers = self._thread_state.parsers = {}
+
+        if language_id in parsers:
+            return parsers[language_id]
             
         try:
             # Use the get_parser function from tree-sitter-language-pack
             parser = get_parser(language_id)
             if parser:
-                self._parsers[language_id] = parser
+                parsers[language_id] = parser
                 return parser
         except Exception as e:
             logger.error(f"Failed to get parser for language {language_id}: {e}")
@@ -113,6 +243,8 @@ class ContextExtractor:
     
     def parse_code(self, code: str, language_id: str) -> Optional[Tree]:
         """Parse code with tree-sitter.
+
+        Trees are cached, so callers must not edit the returned tree.
         
         Args:
             code: The source code to parse
@@ -121,12 +253,41 @@ class ContextExtractor:
         Returns:
             The parse tree, or None if parsing failed
         """
+        parsed = self._parse_code_with_source(code, language_id)
+        return parsed[0] if parsed else None
+
+    def _parse_code_with_source(self, code: str, language_id: str) -> Optional[Tuple[Tree, bytes]]:
+        """Parse code with tree-sitter, also returning the encoded source.
+
+        Node byte offsets index into the UTF-8 source, not the str, so extracting
+        node text needs the bytes; they are encoded once and cached with the tree.
+
+        Args:
+            code: The source code to parse
+            language_id: The language identifier
+
+        Returns:
+            Tuple of (tree, utf8_source), or None if parsing failed
+        """
         parser = self._get_parser(language_id)
         if not parser:
             return None
             
+        key = (language_id, code)
+        with self._tree_cache_lock:
+            parsed = self._tree_cache.get(key)
+            if parsed is not None:
+                self._tree_cache.move_to_end(key)
+                return parsed
+
         try:
-            return parser.parse(bytes(code, 'utf-8'))
+            source = code.encode('utf-8')
+            parsed = (parser.parse(source), source)
+            with self._tree_cache_lock:
+                self._tree_cache[key] = parsed
+                if len(self._tree_cache) > self._tree_cache_size:
+                    self._tree_cache.popitem(last=False)
+            return parsed
         except Exception as e:
             logger.error(f"Failed to parse code: {e}")
             return None
@@ -150,57 +311,87 @@ class ContextExtractor:
             (zero_based_line, 0)
         )
         
-    def find_containing_code_unit(self, node: Node) -> Node:
+    def find_containing_code_unit(self, node: Node, unit_memo: Optional[Dict[int, Tuple[Optional[Node], Optional[Node]]]] = None) -> Node:
         """Find the containing code unit for a node.
         
         This method walks up the tree to find a node that represents a complete
         code unit such as a function, class, or other significant structure.
-        It uses heuristics that work across languages.
+        It uses heuristics that work across languages: the innermost candidate
+        ancestor with a definition-like type wins, otherwise the outermost
+        candidate ancestor, otherwise the node itself.
+
+        When resolving many nodes of the same tree, pass the same unit_memo to
+        every call so the ancestors they share are only evaluated once.
         
         Args:
             node: The starting node
+            unit_memo: Optional memo of evaluated ancestors, valid for one tree only
             
         Returns:
             The node representing the containing code unit
         """
         if not node:
             return None
-            
-        # Start with the given node
+
+        if unit_memo is None:
+            unit_memo = {}
+
+        # Walk up the tree until the root, an ancestor that was already evaluated, or
+        # the first definition: nothing above it can change the result
+        chain = []
+        definition, outermost = None, None
         current = node
-        best_candidate = node
-        
-        # Walk up the tree looking for a code unit
         while current.parent:
             parent = current.parent
             
             # If we've reached the root, stop
             if parent.parent is None:
                 break
-                
+
+            if parent.id in unit_memo:
+                definition, outermost = unit_memo[parent.id]
+                break
+
             current = parent
-            
-            # Heuristics for identifying code units:
-            # 1. Spans multiple lines
-            # 2. Has multiple children
-            # 3. Has meaningful depth in the tree
-            spans_multiple_lines = current.end_point[0] - current.start_point[0] >= 2
-            has_multiple_children = len([c for c in current.children if c.is_named]) >= 2
-            
-            # Check if this looks like a complete code unit
-            if spans_multiple_lines and has_multiple_children:
-                # Higher-quality candidate than what we've seen so far
-                best_candidate = current
-                
-                # If this node has a type that suggests a definition, prefer it
-                node_type = current.type.lower()
-                definition_indicators = ['function', 'method', 'class', 'def', 'procedure']
-                
-                if any(indicator in node_type for indicator in definition_indicators):
-                    # This is likely a function, method, or class definition
-                    return current
-        
-        return best_candidate
+            is_candidate, is_definition = self._classify_code_unit(current)
+            chain.append((current, is_candidate, is_definition))
+            if is_definition:
+                break
+
+        # Record the candidates found at and above each new ancestor, top down. Above
+        # a definition only the definition itself matters, so the unexplored part of
+        # the chain can be treated as empty.
+        for ancestor, is_candidate, is_definition in reversed(chain):
+            if is_candidate and outermost is None:
+                outermost = ancestor
+            if is_definition:
+                definition = ancestor
+            unit_memo[ancestor.id] = (definition, outermost)
+
+        # A definition (function, method, class) is preferred over other candidates
+        return definition or outermost or node
+
+    def _classify_code_unit(self, node: Node) -> Tuple[bool, bool]:
+        """Check whether a node looks like a code unit and whether it is a definition.
+
+        Args:
+            node: The node to check
+
+        Returns:
+            Tuple of (is_candidate, is_definition)
+        """
+        # Heuristics for identifying code units:
+        # 1. Spans multiple lines
+        # 2. Has multiple children
+        # 3. Has meaningful depth in the tree
+        if node.end_point[0] - node.start_point[0] < 2:
+            return False, False
+        # Counted in C, without materializing the children as Python objects
+        if node.named_child_count < 2:
+            return False, False
+
+        # If this node has a type that suggests a definition, prefer it
+        return True, _is_definition_type(node.type)
         
     def extract_context(self, file_path: str, file_content: str, line: int) -> Optional[Tuple[str, CodeContext]]:
         """Extract code context for a specific line.
@@ -213,18 +404,100 @@ class ContextExtractor:
         Returns:
             Tuple of (code_text, code_context) or None if extraction failed
         """
+        parsed = self._parse_file(file_path, file_content)
+        if not parsed:
+            return self._fallback_context_extraction(file_content, line, file_path)
+
+        return self._extract_context_from_tree(parsed, file_path, file_content, line)
+
+    def build_index(self, file_path: str, file_content: str) -> FileIndex:
+        """Parse a file once for context lookups of many lines.
+
+        Args:
+            file_path: Path to the file
+            file_content: Content of the file
+
+        Returns:
+            FileIndex whose lookup(line) matches extract_context for this file
+        """
+        return FileIndex(self, file_path, file_content, self._parse_file(file_path, file_content))
+
+    def extract_contexts_for_lines(self, file_path: str, file_content: str, lines: List[int]) -> Dict[int, CodeContext]:
+        """Extract the code context of several lines of the same file.
+
+        The file is parsed once for all lines instead of once per line.
+
+        Args:
+            file_path: Path to the file
+            file_content: Content of the file
+            lines: Line numbers (1-based)
+
+        Returns:
+            Dictionary mapping each line to its code context; lines for which
+            extraction failed are omitted
+        """
+        parsed = self._parse_file(file_path, file_content)
+
+        contexts: Dict[int, CodeContext] = {}
+        # Lines of the same file share most of their ancestors; evaluate each once
+        unit_memo: Dict[int, Tuple[Optional[Node], Optional[Node]]] = {}
+        for line in sorted(set(lines)):
+            if parsed:
+                result = self._extract_context_from_tree(parsed, file_path, file_content, line, unit_memo)
+            else:
+                result = self._fallback_context_extraction(file_content, line, file_path)
+            if result:
+                contexts[line] = result[1]
+
+        return contexts
+
+    def _parse_file(self, file_path: str, file_content: str) -> Optional[Tuple[Tree, bytes]]:
+        """Detect the language of a file and parse it.
+
+        Args:
+            file_path: Path to the file
+            file_content: Content of the file
+
+        Returns:
+            Tuple of (tree, utf8_source), or None if the language is unknown or
+            parsing failed
+        """
         # Detect language
         language_id = self._detect_language(file_path)
         if not language_id:
             logger.warning(f"Could not detect language for {file_path}")
-            return self._fallback_context_extraction(file_content, line, file_path)
-            
+            return None
+
         # Parse the code
-        tree = self.parse_code(file_content, language_id)
-        if not tree:
+        parsed = self._parse_code_with_source(file_content, language_id)
+        if not parsed:
             logger.warning(f"Could not parse {file_path}")
-            return self._fallback_context_extraction(file_content, line, file_path)
-            
+            return None
+
+        return parsed
+
+    def _extract_context_from_tree(
+        self,
+        parsed: Tuple[Tree, bytes],
+        file_path: str,
+        file_content: str,
+        line: int,
+        unit_memo: Optional[Dict[int, Tuple[Optional[Node], Optional[Node]]]] = None,
+    ) -> Optional[Tuple[str, CodeContext]]:
+        """Extract code context for a specific line from a parsed file.
+
+        Args:
+            parsed: The parse tree of the file and its UTF-8 source
+            file_path: Path to the file
+            file_content: Content of the file
+            line: Line number (1-based)
+            unit_memo: Optional ancestor memo shared across lines of this tree
+
+        Returns:
+            Tuple of (code_text, code_context) or None if extraction failed
+        """
+        tree, source = parsed
+
         # Find the node at the specified line
         node = self.find_node_at_line(tree, line)
         if not node:
@@ -232,15 +505,15 @@ class ContextExtractor:
             return self._fallback_context_extraction(file_content, line, file_path)
             
         # Find the containing code unit
-        unit_node = self.find_containing_code_unit(node)
+        unit_node = self.find_containing_code_unit(node, unit_memo)
         if not unit_node:
             logger.warning(f"Could not find containing code unit at line {line} in {file_path}")
             return self._fallback_context_extraction(file_content, line, file_path)
             
-        # Extract the code context
+        # Extract the code context; byte offsets index into the encoded source
         start_byte = unit_node.start_byte
         end_byte = unit_node.end_byte
-        code_text = file_content[start_byte:end_byte]
+        code_text = source[start_byte:end_byte].decode('utf-8')
         
         # Create context object
         context = CodeContext(
@@ -252,6 +525,28 @@ class ContextExtractor:
         
         return code_text, context
         
+    def _get_lines(self, content: str) -> List[str]:
+        """Split file content into lines, reusing the result for repeated calls.
+
+        Args:
+            content: File content
+
+        Returns:
+            The content's lines; callers must not modify the list
+        """
+        with self._lines_cache_lock:
+            lines = self._lines_cache.get(content)
+            if lines is not None:
+                self._lines_cache.move_to_end(content)
+                return lines
+
+        lines = content.splitlines()
+        with self._lines_cache_lock:
+            self._lines_cache[content] = lines
+            if len(self._lines_cache) > self._lines_cache_size:
+                self._lines_cache.popitem(last=False)
+        return lines
+
     def _fallback_context_extraction(self, content: str, line: int, file_path: str) -> Optional[Tuple[str, CodeContext]]:
         """Extract context using a simple line-based fallback approach.
         
@@ -263,7 +558,7 @@ class ContextExtractor:
         Returns:
             Tuple of (code_text, code_context) using a simple approach
         """
-        lines = content.splitlines()
+        lines = self._get_lines(content)
         if not lines or line > len(lines):
             return None
             
@@ -315,30 +610,20 @@ class ContextExtractor:
         """
         context = {
             "file_path": file_path,
-            "extension": os.path.splitext(file_path)[1],
+            "extension": _get_extension(file_path),
             "imports": [],
             "language": self._detect_language(file_path)
         }
         
         # Extract imports using simple line-based analysis
         # This is a basic implementation that works across many languages
-        import_indicators = {
-            'python': ['import ', 'from '],
-            'javascript': ['import ', 'require('],
-            'typescript': ['import ', 'require('],
-            'java': ['import '],
-            'rust': ['use '],
-            'go': ['import '],
-        }
-        
-        lang = context["language"]
-        if lang in import_indicators:
-            indicators = import_indicators[lang]
-            lines = file_content.splitlines()
-            
-            for line in lines[:50]:  # Look only at the first 50 lines
+        indicators = _IMPORT_INDICATORS.get(context["language"])
+        if indicators:
+            # Look only at the first 50 lines, without splitting the rest of the file
+            for line in file_content.split('\n', 50)[:50]:
                 line_stripped = line.strip()
-                if any(line_stripped.startswith(indicator) for indicator in indicators):
+                # str.startswith checks the whole tuple of prefixes at once
+                if line_stripped.startswith(indicators):
                     context["imports"].append(line_stripped)
         
         return context 
\ No newline at end of file
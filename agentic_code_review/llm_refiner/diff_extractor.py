@@ -4,28 +4,47 @@ This module provides functionality for extracting complete code units from diffs
 allowing for better context when analyzing and applying code changes.
 """
 
+import functools
 import logging
 import re
-from typing import Optional, Tuple
+from typing import Dict, Iterator, Optional, Tuple
 
 from ..github_app.models import PRFile
-from .context_extractor import ContextExtractor
+from .context_extractor import ContextExtractor, FileIndex
 from .models import CodeContext, CodeDiffUnit
 
 logger = logging.getLogger(__name__)
 
 # Regex pattern for extracting line numbers from change headers
 CHANGE_HEADER_PATTERN = re.compile(r'@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@')
-# Pattern to find all change headers in a patch
-FIND_CHANGES_PATTERN = re.compile(r'(@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@.*)')
+# Pattern to find all change headers in a patch; group 1 is the full header line,
+# groups 2 and 3 are the old and new start line numbers
+HUNK_RE = re.compile(r'(@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@.*)')
+# Pattern matching the added, removed and context lines of a change body
+DIFF_LINE_PATTERN = re.compile(r'^([ +\-])([^\n]*)', re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=2048)
+def _parse_hunk_header(change_header: str) -> Optional[Tuple[int, int]]:
+    """Parse the old and new start lines from a change header, or None if it is malformed."""
+    match = CHANGE_HEADER_PATTERN.match(change_header)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
 
 
 class DiffExtractor:
     """Extract complete code units from diffs."""
 
-    def __init__(self):
-        """Initialize the diff extractor."""
+    def __init__(self, annotate_lines: bool = True):
+        """Initialize the diff extractor.
+
+        Args:
+            annotate_lines: Whether to prefix each diff line with its line numbers.
+                Callers that only need the raw hunks can disable it to skip the pass.
+        """
         self.context_extractor = ContextExtractor()
+        self.annotate_lines = annotate_lines
 
     def _extract_line_numbers(self, change_header: str) -> tuple[Optional[int], Optional[int]]:
         """Extract old and new line numbers from a change header.
@@ -36,50 +55,63 @@ class DiffExtractor:
         Returns:
             Tuple of (old_start_line, new_start_line) or (None, None) if parsing fails
         """
-        match = CHANGE_HEADER_PATTERN.match(change_header)
-        if not match:
+        line_numbers = _parse_hunk_header(change_header)
+        if line_numbers is None:
             logger.warning(f"Invalid change header format: {change_header}")
             return None, None
 
-        return int(match.group(1)), int(match.group(2))
+        return line_numbers
+
+    def _iter_change_sections(self, patch: str) -> Iterator[Tuple[re.Match, int]]:
+        """Lazily yield each change header match with the offset where its section ends.
+
+        Args:
+            patch: The complete file patch
 
-    def _extract_change_content(self, patch: str, change_header: str) -> Tuple[str, int, int]:
+        Yields:
+            Tuples of (hunk_match, end_pos), where end_pos is the start of the next
+            change header or the end of the patch
+        """
+        previous = None
+        for match in HUNK_RE.finditer(patch):
+            if previous is not None:
+                yield previous, match.start()
+            previous = match
+        if previous is not None:
+            yield previous, len(patch)
+
+    def _extract_change_content(self, patch: str, hunk_match: re.Match, end_pos: int) -> Tuple[str, int, int]:
         """Extract the complete content of a change section from the patch with line numbers.
 
         Args:
             patch: The complete file patch
-            change_header: The change header to find
+            hunk_match: HUNK_RE match of the section's change header
+            end_pos: Offset where the section ends (the next change header or the end of the patch)
 
         Returns:
             Tuple of (change_content, old_start_line, new_start_line)
-            where change_content is the complete change content including the header and all changed lines,
+            where change_content is the complete change content including the header and all changed lines
+            (annotated with line numbers unless annotate_lines is disabled),
             old_start_line is the starting line number in the old file,
             and new_start_line is the starting line number in the new file
         """
-        logger.debug(f"Extracting change content from patch: {change_header}")
-        
-        # Find the position of this change header in the patch
-        start_pos = patch.find(change_header)
-        if start_pos == -1:
-            logger.warning(f"Could not find change header in patch: {change_header}")
-            return change_header, 0, 0
-
-        # Find the end of this change section by looking for the next change header or end of patch
-        next_change = FIND_CHANGES_PATTERN.search(patch, start_pos + len(change_header))
-        if next_change:
-            end_pos = next_change.start()
-        else:
-            end_pos = len(patch)
-
-        # Extract the complete change section
-        raw_change_content = patch[start_pos:end_pos].strip()
-        
-        # Extract line numbers from header
-        old_start, new_start = self._extract_line_numbers(change_header)
-        if old_start is None or new_start is None:
-            logger.warning(f"Could not extract line numbers from header: {change_header}")
-            return raw_change_content, 0, 0
-        
+        change_header = hunk_match.group(1)
+        logger.debug("Extracting change content from patch: %s", change_header)
+
+        # Extract the complete change section, trimming trailing whitespace by offset
+        # so that only one substring is created
+        start_pos = hunk_match.start()
+        while end_pos > start_pos and patch[end_pos - 1].isspace():
+            end_pos -= 1
+        raw_change_content = patch[start_pos:end_pos]
+
+        # Line numbers come straight from the header match, which only matches
+        # well-formed headers
+        old_start, new_start = int(hunk_match.group(2)), int(hunk_match.group(3))
+
+        if not self.annotate_lines:
+            return raw_change_content, old_start, new_start
+
         # Add line numbers to the diff content
         annotated_diff = self._add_line_numbers(raw_change_content, old_start, new_start)
         return annotated_diff, old_start, new_start
@@ -95,55 +127,72 @@ class DiffExtractor:
         Returns:
             Diff content with line numbers added to each line
         """
-        lines = diff_content.split('\n')
-        if not lines:
-            return diff_content
-            
         # The first line is the diff header, keep it as is
-        result = [lines[0]]
-        
+        header_end = diff_content.find('\n')
+        if header_end == -1:
+            return diff_content
+
         # Track current line positions
         old_line = old_start
         new_line = new_start
-        
-        # Process each line after the header
-        for line in lines[1:]:
-            if not line:
-                result.append(line)
-                continue
-                
-            if line.startswith('\\'):
-                # Special case for "\ No newline at end of file"
-                result.append(line)
-                continue
-                
-            if line.startswith('+'):
+
+        def annotate(match: re.Match) -> str:
+            nonlocal old_line, new_line
+            marker, text = match.groups()
+            if marker == '+':
                 # Added line (only in new file)
-                result.append(f"+{new_line}: {line[1:]}")
+                annotated = f"+{new_line}: {text}"
                 new_line += 1
-            elif line.startswith('-'):
+            elif marker == '-':
                 # Removed line (only in old file)
-                result.append(f"-{old_line}: {line[1:]}")
+                annotated = f"-{old_line}: {text}"
                 old_line += 1
-            elif line.startswith(' '):
+            else:
                 # Context line (in both files)
                 # We show both line numbers for clarity
-                result.append(f" {old_line},{new_line}: {line[1:]}")
+                annotated = f" {old_line},{new_line}: {text}"
                 old_line += 1
                 new_line += 1
-            else:
-                # Anything else, keep as is
-                result.append(line)
-                
-        return '\n'.join(result)
+            return annotated
+
+        # Empty lines, "\ No newline at end of file" markers and anything else
+        # are not matched and stay as they are
+        body = DIFF_LINE_PATTERN.sub(annotate, diff_content[header_end + 1:])
+        return diff_content[:header_end + 1] + body
+
+    def _build_file_index(self, file_path: str, content: Optional[str]) -> Optional[FileIndex]:
+        """Parse one version of a file for the context lookups of all its hunks.
+
+        Args:
+            file_path: Path to the file
+            content: File content
+
+        Returns:
+            A FileIndex, or None if there is no content or indexing failed
+        """
+        if not content:
+            return None
+
+        try:
+            return self.context_extractor.build_index(file_path, content)
+        except Exception as e:
+            logger.error(f"Error indexing {file_path}: {e}")
+            return None
 
-    def _extract_code_context(self, file_path: str, line: int, content: Optional[str]) -> tuple[Optional[str], Optional[CodeContext]]:
+    def _extract_code_context(
+        self,
+        file_path: str,
+        line: int,
+        content: Optional[str],
+        file_index: Optional[FileIndex] = None
+    ) -> tuple[Optional[str], Optional[CodeContext]]:
         """Extract code and context at a given line.
 
         Args:
             file_path: Path to the file
             line: Line number to extract context from
             content: File content
+            file_index: Optional index of the same content, used instead of extracting from scratch
 
         Returns:
             Tuple of (code_text, code_context) or (None, None) if extraction fails
@@ -152,15 +201,18 @@ class DiffExtractor:
             return None, None
 
         try:
-            extraction_result = self.context_extractor.extract_context(
-                file_path=file_path,
-                file_content=content,
-                line=line
-            )
+            if file_index is not None:
+                extraction_result = file_index.lookup(line)
+            else:
+                extraction_result = self.context_extractor.extract_context(
+                    file_path=file_path,
+                    file_content=content,
+                    line=line
+                )
 
             if extraction_result:
                 code, context = extraction_result
-                logger.debug(f"Extracted context at line {line}: {context.start_line}-{context.end_line}")
+                logger.debug("Extracted context at line %d: %d-%d", line, context.start_line, context.end_line)
                 return code, context
             else:
                 logger.warning(f"Failed to extract context at line {line}")
@@ -170,23 +222,57 @@ class DiffExtractor:
             logger.error(f"Error extracting context at line {line}: {e}")
             return None, None
 
-    def _get_unit_key(self, code_diff_unit: CodeDiffUnit) -> Optional[tuple]:
-        """Get a unique key for a code diff unit based on its context.
+    def _get_cached_code_context(
+        self,
+        context_cache: Optional[Dict[tuple, tuple]],
+        side: str,
+        file_path: str,
+        line: int,
+        content: Optional[str],
+        file_indexes: Optional[Dict[str, Optional[FileIndex]]] = None
+    ) -> tuple[Optional[str], Optional[CodeContext]]:
+        """Extract code and context at a given line, reusing earlier results for the same side and line.
 
         Args:
-            code_diff_unit: The code diff unit
+            context_cache: Cache shared across the hunks of one patch, or None to disable caching
+            side: "before" or "after", identifying which version of the file content is used
+            file_path: Path to the file
+            line: Line number to extract context from
+            content: File content
+            file_indexes: Optional indexes of the file contents, keyed by side
 
         Returns:
-            A tuple that can be used as a unique identifier, or None if not possible
+            Tuple of (code_text, code_context) or (None, None) if extraction fails
         """
-        if code_diff_unit.before_context:
-            return ("before",
-                   code_diff_unit.before_context.start_line,
-                   code_diff_unit.before_context.end_line)
-        elif code_diff_unit.after_context:
-            return ("after",
-                   code_diff_unit.after_context.start_line,
-                   code_diff_unit.after_context.end_line)
+        file_index = file_indexes.get(side) if file_indexes else None
+        if context_cache is None:
+            return self._extract_code_context(file_path, line, content, file_index)
+
+        key = (side, line)
+        cached = context_cache.get(key)
+        if cached is None:
+            cached = self._extract_code_context(file_path, line, content, file_index)
+            context_cache[key] = cached
+        return cached
+
+    @staticmethod
+    def _get_context_key(
+        before_context: Optional[CodeContext],
+        after_context: Optional[CodeContext]
+    ) -> Optional[tuple]:
+        """Get the unique key of the code unit spanned by a before/after context pair.
+
+        Args:
+            before_context: Context of the unit in the old file
+            after_context: Context of the unit in the new file
+
+        Returns:
+            A tuple that can be used as a unique identifier, or None if neither context exists
+        """
+        if before_context:
+            return ("before", before_context.start_line, before_context.end_line)
+        elif after_context:
+            return ("after", after_context.start_line, after_context.end_line)
         return None
 
     def extract_code_unit_from_change(
@@ -194,7 +280,9 @@ class DiffExtractor:
         change_header: str,
         file_path: str,
         before_content: Optional[str] = None,
-        after_content: Optional[str] = None
+        after_content: Optional[str] = None,
+        old_start: Optional[int] = None,
+        new_start: Optional[int] = None
     ) -> Optional[CodeDiffUnit]:
         """Extract a complete code unit from a change section.
 
@@ -203,41 +291,73 @@ class DiffExtractor:
             file_path: Path to the file being modified
             before_content: Complete file content before the change
             after_content: Complete file content after the change
+            old_start: Starting line in the old file, if already parsed from the header
+            new_start: Starting line in the new file, if already parsed from the header
 
         Returns:
             A CodeDiffUnit or None if extraction failed
         """
         try:
-            # Extract line numbers from change header
-            old_start, new_start = self._extract_line_numbers(change_header)
+            # Extract line numbers from change header unless the caller already has them
             if old_start is None or new_start is None:
-                return None
+                old_start, new_start = self._extract_line_numbers(change_header)
+                if old_start is None or new_start is None:
+                    return None
 
-            # Extract code context from before and after versions
-            before_code, before_context = self._extract_code_context(
-                file_path, old_start, before_content)
-            after_code, after_context = self._extract_code_context(
-                file_path, new_start, after_content)
-
-            # Require at least one context
-            if not before_context and not after_context:
+            unit = self._build_code_diff_unit(
+                file_path, change_header, old_start, new_start, before_content, after_content)
+            if unit is None:
                 logger.warning(f"Could not extract any context from {file_path}")
-                return None
-
-            # Create and return the CodeDiffUnit
-            return CodeDiffUnit(
-                file_path=file_path,
-                before_code=before_code,
-                after_code=after_code,
-                before_context=before_context,
-                after_context=after_context,
-                diff_texts=[change_header]
-            )
+            return unit
 
         except Exception as e:
             logger.error(f"Error extracting code unit from {file_path}: {e}", exc_info=True)
             return None
 
+    def _build_code_diff_unit(
+        self,
+        file_path: str,
+        diff_text: str,
+        old_start: int,
+        new_start: int,
+        before_content: Optional[str],
+        after_content: Optional[str],
+        context_cache: Optional[Dict[tuple, tuple]] = None,
+        file_indexes: Optional[Dict[str, Optional[FileIndex]]] = None
+    ) -> Optional[CodeDiffUnit]:
+        """Build the code diff unit for a change from the contexts of both file versions.
+
+        Args:
+            file_path: Path to the file being modified
+            diff_text: The change's diff text
+            old_start: Starting line in the old file
+            new_start: Starting line in the new file
+            before_content: Complete file content before the change
+            after_content: Complete file content after the change
+            context_cache: Optional cache shared across the hunks of one patch
+            file_indexes: Optional indexes of the file contents, keyed by side
+
+        Returns:
+            A CodeDiffUnit, or None if neither version has a context at the change
+        """
+        before_code, before_context = self._get_cached_code_context(
+            context_cache, "before", file_path, old_start, before_content, file_indexes)
+        after_code, after_context = self._get_cached_code_context(
+            context_cache, "after", file_path, new_start, after_content, file_indexes)
+
+        # Require at least one context
+        if not before_context and not after_context:
+            return None
+
+        return CodeDiffUnit(
+            file_path=file_path,
+            before_code=before_code,
+            after_code=after_code,
+            before_context=before_context,
+            after_context=after_context,
+            diff_texts=[diff_text]
+        )
+
     def collect_unique_diff_units(
         self,
         patch: str,
@@ -261,46 +381,55 @@ class DiffExtractor:
             return []
 
         try:
-            # Extract all change headers
-            change_headers = FIND_CHANGES_PATTERN.findall(patch)
-            if not change_headers:
-                logger.warning(f"No changes found in patch for {file_path}")
-                return []
-
-            logger.debug(f"Found {len(change_headers)} changes in {file_path}")
-
             # Process each change header and track unique units
-            unique_units = {}
-
-            for i, header in enumerate(change_headers):
+            unique_units: Dict[tuple, CodeDiffUnit] = {}
+            # Contexts extracted so far, keyed by (side, line); hunks in the same unit reuse them
+            ctx_cache: Dict[tuple, tuple] = {}
+            # Each version of the file is parsed once; hunks only look lines up in it
+            file_indexes = {
+                "before": self._build_file_index(file_path, before_content),
+                "after": self._build_file_index(file_path, after_content),
+            }
+            total_hunks = 0
+
+            # Change headers are located in a single streaming pass; each section ends where the next begins
+            for match, end_pos in self._iter_change_sections(patch):
+                total_hunks += 1
                 # Get the complete change content with line numbers
-                change_content, old_start, new_start = self._extract_change_content(patch, header)
-
-                # Extract the code unit for this change
-                code_diff_unit = self.extract_code_unit_from_change(
-                    change_header=header,
-                    file_path=file_path,
-                    before_content=before_content,
-                    after_content=after_content
-                )
-
-                if not code_diff_unit:
-                    continue
-
-                # Get a unique key for this code unit
-                unit_key = self._get_unit_key(code_diff_unit)
+                change_content, old_start, new_start = self._extract_change_content(patch, match, end_pos)
+
+                # Resolve the context that decides which unit this change belongs to;
+                # the after context only matters when there is no before context
+                _, before_context = self._get_cached_code_context(
+                    ctx_cache, "before", file_path, old_start, before_content, file_indexes)
+                after_context = None
+                if not before_context:
+                    _, after_context = self._get_cached_code_context(
+                        ctx_cache, "after", file_path, new_start, after_content, file_indexes)
+
+                unit_key = self._get_context_key(before_context, after_context)
                 if not unit_key:
+                    logger.warning(f"Could not extract any context from {file_path}")
                     continue
 
-                # Store unique units, merging diffs for the same unit
+                # Add this change to an existing unit
                 if unit_key in unique_units:
-                    # Add this change to the existing unit
                     unique_units[unit_key].add_diff_text(change_content)
-                else:
-                    # Store new unit with full change content
-                    code_diff_unit.diff_texts = [change_content]
-                    unique_units[unit_key] = code_diff_unit
+                    continue
+
+                # Build the CodeDiffUnit only for a new unit, with the full change content;
+                # the contexts resolved above come from the cache, so one of them exists
+                unit = self._build_code_diff_unit(
+                    file_path, change_content, old_start, new_start,
+                    before_content, after_content, ctx_cache, file_indexes)
+                if unit is not None:
+                    unique_units[unit_key] = unit
+
+            if not total_hunks:
+                logger.warning(f"No changes found in patch for {file_path}")
+                return []
 
+            logger.debug("Found %d changes in %s", total_hunks, file_path)
             result = list(unique_units.values())
             logger.info(f"Extracted {len(result)} unique code diff units from {file_path}")
             return result
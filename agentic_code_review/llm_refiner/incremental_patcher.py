@@ -5,10 +5,11 @@ using tree-sitter in a language-agnostic way.
 """
 
 import logging
-from typing import Optional
+from bisect import bisect_left
+from itertools import chain, pairwise
+from typing import Callable, Iterator, List, Optional
 
-from tree_sitter import Node
-from tree_sitter_language_pack import get_parser
+from tree_sitter import Node, Parser, Tree
 
 from agentic_code_review.utils.code_formatter import format_code
 
@@ -19,28 +20,62 @@ logger = logging.getLogger(__name__)
 
 # Maximum number of characters to show in error context
 MAX_ERROR_CONTEXT_LENGTH = 50
+# A UTF-8 character takes at most 4 bytes, so this many bytes always hold more
+# than MAX_ERROR_CONTEXT_LENGTH characters
+_ERROR_CONTEXT_BYTES = 4 * (MAX_ERROR_CONTEXT_LENGTH + 1)
+# Maximum number of syntax errors logged in detail by validate_result
+_MAX_REPORTED_ERRORS = 5
+
+# ASCII bytes that str.strip() removes; non-ASCII whitespace is multi-byte in UTF-8
+_ASCII_WHITESPACE = frozenset(b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f')
+# Bytes below this are ASCII; anything at or above it is part of a multi-byte UTF-8 sequence
+_ASCII_LIMIT = 0x80
+
+# Top-level node types that make up a file's header, per language, as
+# (import types, anchor types, types skipped over, anchor must be the first node).
+# Imports go after the last import, else after the last anchor (Java package
+# declaration, Python module docstring, JS/TS header comment or hashbang).
+_HEADER_NODE_TYPES = {
+    'python': (frozenset({'import_statement', 'import_from_statement'}), frozenset({'string'}), frozenset({'string'}), True),
+    'java': (frozenset({'import_declaration'}), frozenset({'package_declaration'}), frozenset(), False),
+    'javascript': (frozenset({'import_statement'}), frozenset({'comment', 'hashbang'}), frozenset(), False),
+    'typescript': (frozenset({'import_statement'}), frozenset({'comment', 'hashbang'}), frozenset(), False),
+}
+
+# Extractor used by patchers created without one. It holds no per-file state,
+# and its parse caches are keyed by content and guarded for concurrent use.
+_SHARED_EXTRACTOR = ContextExtractor()
 
 
 class IncrementalPatcher:
     """Apply code changes incrementally using tree-sitter."""
 
-    def __init__(self, file_content: str, file_path: str):
+    def __init__(self, file_content: str, file_path: str, extractor: Optional[ContextExtractor] = None):
         """Initialize the incremental patcher.
 
         Args:
             file_content: The initial file content
             file_path: The path to the file
+            extractor: Optional context extractor, whose cached parsers are reused
+                across files; a module-wide shared one is used if not provided
         """
+        # Content is kept as UTF-8 bytes: tree-sitter parses bytes and all node and
+        # modification offsets are byte offsets
         self.current_content = file_content
         self.file_path = file_path
-        self.extractor = ContextExtractor()
+        self.extractor = extractor or _SHARED_EXTRACTOR
         self.language_id = self.extractor._detect_language(file_path)
+        # Parser for the language, fetched once; a patcher is used by a single thread
+        self._parser: Optional[Parser] = None
+        # Set when the content has changed since the tree was last parsed; see _ensure_fresh_tree
+        self._tree_dirty = False
 
         # Initialize the tree if language is supported
+        self.tree: Optional[Tree]
         if self.language_id:
             try:
-                parser = get_parser(self.language_id)
-                self.tree = parser.parse(bytes(file_content, 'utf-8'))
+                parser = self._get_parser()
+                self.tree = parser.parse(self._get_source_bytes())
             except Exception as e:
                 logger.error(f"Failed to parse code during initialization: {e}")
                 self.tree = None
@@ -49,6 +84,115 @@ class IncrementalPatcher:
 
         self.modifications: list[FileModification] = []
 
+    @property
+    def current_content(self) -> str:
+        """The current file content, decoded from the UTF-8 working buffer."""
+        return self._source.decode('utf-8')
+
+    @current_content.setter
+    def current_content(self, content: str) -> None:
+        self._source = bytearray(content.encode('utf-8'))
+        # Immutable snapshot of _source handed to the parser, built on first use
+        self._source_bytes: Optional[bytes] = None
+        # Byte offsets of every newline in _source, built on first use
+        self._newline_offsets: Optional[List[int]] = None
+        # No existing tree describes the new content; parse it from scratch when next needed
+        self.tree = None
+        self._tree_dirty = True
+
+    def _get_source_bytes(self) -> bytes:
+        """Get the content as bytes for parsing, reusing the snapshot while it is unchanged.
+
+        Returns:
+            The UTF-8 content
+        """
+        if self._source_bytes is None:
+            self._source_bytes = bytes(self._source)
+        return self._source_bytes
+
+    def _get_newline_offsets(self) -> List[int]:
+        """Get the sorted byte offsets of all newlines in the content.
+
+        Returns:
+            The newline offsets
+        """
+        if self._newline_offsets is None:
+            offsets = []
+            source = self._source
+            position = source.find(b'\n')
+            while position != -1:
+                offsets.append(position)
+                position = source.find(b'\n', position + 1)
+            self._newline_offsets = offsets
+        return self._newline_offsets
+
+    def _splice_source(self, start_byte: int, end_byte: int, new_bytes: bytes) -> None:
+        """Replace a byte range of the content, keeping the newline offsets in sync.
+
+        Args:
+            start_byte: Start of the replaced range
+            end_byte: End of the replaced range
+            new_bytes: The replacement bytes
+        """
+        self._source[start_byte:end_byte] = new_bytes
+        self._source_bytes = None
+
+        offsets = self._newline_offsets
+        if offsets is None:
+            return
+
+        # Drop newlines of the replaced range, shift the ones after it and add the new ones
+        delta = len(new_bytes) - (end_byte - start_byte)
+        first = bisect_left(offsets, start_byte)
+        after = bisect_left(offsets, end_byte)
+        inserted = []
+        position = new_bytes.find(b'\n')
+        while position != -1:
+            inserted.append(start_byte + position)
+            position = new_bytes.find(b'\n', position + 1)
+        offsets[first:] = inserted + [offset + delta for offset in offsets[after:]]
+
+    def _get_parser(self) -> Parser:
+        """Get the parser for this file's language.
+
+        The extractor's parser is fetched on first use and kept for every later
+        parse.
+
+        Returns:
+            The parser
+
+        Raises:
+            ValueError: If the file has no detected language or no parser is available for it
+        """
+        if self._parser is None:
+            if self.language_id is None:
+                raise ValueError(f"No language detected for {self.file_path}")
+            parser = self.extractor._get_parser(self.language_id)
+            if parser is None:
+                raise ValueError(f"No parser available for language {self.language_id}")
+            self._parser = parser
+        return self._parser
+
+    def _ensure_fresh_tree(self) -> None:
+        """Reparse the tree if the content has changed since the last parse.
+
+        Edits recorded with tree.edit are reparsed incrementally; after the whole
+        content has been replaced the tree is parsed from scratch.
+        """
+        if not self._tree_dirty or not self.language_id:
+            return
+
+        self._tree_dirty = False
+        try:
+            parser = self._get_parser()
+            if self.tree is None:
+                self.tree = parser.parse(self._get_source_bytes())
+            else:
+                self.tree = parser.parse(self._get_source_bytes(), self.tree)
+        except Exception as e:
+            logger.error(f"Failed to re-parse tree after edits: {e}")
+            self.tree = None
+
     def get_node_at_line(self, line: int) -> Optional[Node]:
         """Get the node at a specific line.
 
@@ -58,6 +202,7 @@ class IncrementalPatcher:
         Returns:
             The node at that line, or None if not found
         """
+        self._ensure_fresh_tree()
         if not self.tree:
             return None
 
@@ -92,7 +237,7 @@ class IncrementalPatcher:
 
         start_byte = node.start_byte
         end_byte = node.end_byte
-        return self.current_content[start_byte:end_byte]
+        return self._source[start_byte:end_byte].decode('utf-8')
 
     def register_modification(self, node: Node, new_text: str, suggestion_ids: list[str]) -> FileModification:
         """Register a modification to be applied.
@@ -144,7 +289,7 @@ class IncrementalPatcher:
         # If we're not at the beginning of the file, check if we need to insert a newline
         if insertion_byte > 0:
             # Check if there's already a newline at the insertion point
-            needs_newline = insertion_byte < len(self.current_content) and self.current_content[insertion_byte-1] != '\n'
+            needs_newline = insertion_byte < len(self._source) and self._source[insertion_byte-1] != ord('\n')
             if needs_newline:
                 # If there's no newline before our insertion point, add one
                 modified_text = "\n" + modified_text
@@ -181,59 +326,35 @@ class IncrementalPatcher:
         Returns:
             A tuple (line_number, byte_position) for the insertion point.
         """
-        if not self.tree or not self.tree.root_node.children:
-            return (0, 0)  # Empty file or parse issue
+        self._ensure_fresh_tree()
+        if not self.tree or not self.tree.root_node.children or self.language_id is None:
+            return (0, 0)  # Empty file, parse issue or unknown language
+
+        # For any unsupported languages, we default to the top
+        header_types = _HEADER_NODE_TYPES.get(self.language_id)
+        if not header_types:
+            return (0, 0)
+        import_types, anchor_types, skipped_types, anchor_first_only = header_types
 
         last_import = None
-        last_package = None
-        module_docstring = None
-        last_header = None
+        last_anchor = None
 
         # Iterate through top-level nodes only
         for idx, node in enumerate(self.tree.root_node.children):
-            # For Python files
-            if self.language_id == "python":
-                # If the very first node is a docstring, mark it
-                if idx == 0 and node.type == "string":
-                    module_docstring = node
-                elif node.type in ("import_statement", "import_from_statement"):
-                    last_import = node
-                # Stop when a non-header element is encountered
-                elif node.type not in ("string", "import_statement", "import_from_statement"):
-                    break
-
-            # For Java files
-            elif self.language_id == "java":
-                if node.type == "package_declaration":
-                    last_package = node
-                elif node.type == "import_declaration":
-                    last_import = node
-                else:
-                    break
-
-            # For JavaScript/TypeScript
-            elif self.language_id in ("javascript", "typescript"):
-                if node.type == "import_statement":
-                    last_import = node
-                elif node.type in ("comment", "hashbang"):
-                    # Save the header comment that appears last
-                    last_header = node
-                else:
-                    break
-
-            # For any unsupported languages, we default to the top
-            else:
+            node_type = node.type
+            if node_type in import_types:
+                last_import = node
+            elif node_type in anchor_types and (idx == 0 or not anchor_first_only):
+                last_anchor = node
+            # Stop when a non-header element is encountered
+            elif node_type not in skipped_types:
                 break
 
         # Choose insertion point based on priority
         if last_import:
             return (last_import.end_point[0], last_import.end_byte)
-        if self.language_id == "java" and last_package:
-            return (last_package.end_point[0], last_package.end_byte)
-        if self.language_id == "python" and module_docstring:
-            return (module_docstring.end_point[0], module_docstring.end_byte)
-        if self.language_id in ("javascript", "typescript") and last_header:
-            return (last_header.end_point[0], last_header.end_byte)
+        if last_anchor:
+            return (last_anchor.end_point[0], last_anchor.end_byte)
         return (0, 0)
 
     def apply_modification(self, modification: FileModification) -> PatchResult:
@@ -247,9 +368,10 @@ class IncrementalPatcher:
         """
         if not self.tree and self.language_id:
             # Try to parse the current content if we don't have a tree
+            self._tree_dirty = False
             try:
-                parser = get_parser(self.language_id)
-                self.tree = parser.parse(bytes(self.current_content, 'utf-8'))
+                parser = self._get_parser()
+                self.tree = parser.parse(self._get_source_bytes())
             except Exception as e:
                 logger.error(f"Failed to parse code during modification application: {e}")
                 self.tree = None
@@ -280,10 +402,8 @@ class IncrementalPatcher:
             end_byte = modification.end_byte
 
             # Verify the content at the byte positions
-            current_content_at_position = self.current_content[start_byte:end_byte]
-
             # If content has changed, we need to find the node by traversal
-            if current_content_at_position.strip() != modification.original_node_text.strip():
+            if not self._content_matches_at(start_byte, end_byte, modification.original_node_text):
                 logger.debug("Content at byte positions has changed, locating node by traversal")
                 # Try to find the node by searching the tree
                 target_node = self._find_node_by_content(modification.original_node_text)
@@ -296,50 +416,7 @@ class IncrementalPatcher:
                 start_byte = target_node.start_byte
                 end_byte = target_node.end_byte
 
-            # Calculate the new end position in terms of bytes and points
-            new_end_byte = start_byte + len(modification.modified_text)
-
-            # Calculate the new end point (line, column)
-            start_point = self._get_point_from_byte(start_byte)
-            old_end_point = self._get_point_from_byte(end_byte)
-
-            lines = modification.modified_text.split('\n')
-            if len(lines) == 1:
-                # Single line change
-                new_end_point = (
-                    start_point[0],
-                    start_point[1] + len(lines[0])
-                )
-            else:
-                # Multi-line change
-                new_end_point = (
-                    start_point[0] + len(lines) - 1,
-                    len(lines[-1])
-                )
-
-            # Apply the edit to tree-sitter's tree
-            self.tree.edit(
-                start_byte=start_byte,
-                old_end_byte=end_byte,
-                new_end_byte=new_end_byte,
-                start_point=start_point,
-                old_end_point=old_end_point,
-                new_end_point=new_end_point
-            )
-
-            # Update the content
-            updated_content = (
-                self.current_content[:start_byte] +
-                modification.modified_text +
-                self.current_content[end_byte:]
-            )
-
-            # Reparse the content to keep the tree in sync, using incremental parsing
-            parser = get_parser(self.language_id)
-            self.tree = parser.parse(bytes(updated_content, 'utf-8'), self.tree)
-
-            # Update current content
-            self.current_content = updated_content
+            new_end_byte = self._record_edit(start_byte, end_byte, modification.modified_text.encode('utf-8'))
 
             # Update byte positions for all remaining modifications
             self._update_modifications_after_edit(
@@ -360,6 +437,79 @@ class IncrementalPatcher:
                 error_message=f"Failed to apply modification: {e!s}"
             )
 
+    def _record_edit(self, start_byte: int, end_byte: int, modified_bytes: bytes) -> int:
+        """Replace a byte range of the content and record the edit on the tree.
+
+        The tree is not reparsed; that is deferred until something needs it.
+
+        Args:
+            start_byte: Start of the replaced range
+            end_byte: End of the replaced range
+            modified_bytes: The replacement, UTF-8 encoded
+
+        Returns:
+            The end byte of the replacement in the updated content
+        """
+        # Calculate the new end position in terms of bytes and points
+        new_end_byte = start_byte + len(modified_bytes)
+
+        # Calculate the new end point (line, column); columns are byte offsets too
+        start_point = self._get_point_from_byte(start_byte)
+        old_end_point = self._get_point_from_byte(end_byte)
+
+        last_newline = modified_bytes.rfind(b'\n')
+        if last_newline == -1:
+            # Single line change
+            new_end_point = (
+                start_point[0],
+                start_point[1] + len(modified_bytes)
+            )
+        else:
+            # Multi-line change
+            new_end_point = (
+                start_point[0] + modified_bytes.count(b'\n'),
+                len(modified_bytes) - last_newline - 1
+            )
+
+        # Apply the edit to tree-sitter's tree; without one, the next parse starts from scratch
+        if self.tree is not None:
+            self.tree.edit(
+                start_byte=start_byte,
+                old_end_byte=end_byte,
+                new_end_byte=new_end_byte,
+                start_point=start_point,
+                old_end_point=old_end_point,
+                new_end_point=new_end_point
+            )
+
+        # Update the content in place
+        self._splice_source(start_byte, end_byte, modified_bytes)
+
+        # Defer the incremental reparse until something needs the tree
+        self._tree_dirty = True
+        return new_end_byte
+
+    def _content_matches_at(self, start_byte: int, end_byte: int, expected_text: str) -> bool:
+        """Check whether a byte range still holds the expected text, ignoring surrounding whitespace.
+
+        Args:
+            start_byte: Start of the range
+            end_byte: End of the range
+            expected_text: The text the range is expected to contain
+
+        Returns:
+            True if the stripped contents of the range equal the stripped expected text
+        """
+        # Common case: positions are still valid and the bytes are identical, which
+        # is checked in place without slicing or decoding
+        expected_bytes = expected_text.encode('utf-8')
+        if end_byte - start_byte == len(expected_bytes) and self._source.startswith(expected_bytes, start_byte, end_byte):
+            return True
+
+        # Stale positions may split a character
+        current_text = self._source[start_byte:end_byte].decode('utf-8', errors='replace')
+        return current_text.strip() == expected_text.strip()
+
     def _get_point_from_byte(self, byte_position: int) -> tuple[int, int]:
         """Get line and column coordinates from a byte position.
 
@@ -367,17 +517,14 @@ class IncrementalPatcher:
             byte_position: The byte position in the content
 
         Returns:
-            Tuple of (line, column) coordinates
+            Tuple of (line, column) coordinates, with the column in bytes as tree-sitter expects
         """
-        # Get content up to the byte position
-        content_before = self.current_content[:byte_position]
-
-        # Count lines and get the last line
-        lines = content_before.split('\n')
-        line = len(lines) - 1  # 0-based
+        # The number of newlines before the position is the 0-based line
+        offsets = self._get_newline_offsets()
+        line = bisect_left(offsets, byte_position)
 
         # Get column in the last line
-        col = len(lines[-1])
+        col = byte_position - (offsets[line - 1] + 1 if line else 0)
 
         return (line, col)
 
@@ -390,14 +537,35 @@ class IncrementalPatcher:
         Returns:
             The node with matching content, or None if not found
         """
+        self._ensure_fresh_tree()
         if not self.tree:
             return None
 
         # Normalize content for comparison
         normalized_content = content.strip()
-
-        # Walk the tree looking for matching content
-        for node in self._walk_tree(self.tree.root_node):
+        target_length = len(normalized_content.encode('utf-8'))
+        source = self._source
+
+        def is_too_short(node: Node) -> bool:
+            return node.end_byte - node.start_byte < target_length
+
+        # Walk the tree looking for matching content; descendants of a node that
+        # is too short are shorter still, so those subtrees are skipped
+        for node in self._walk_tree(self.tree.root_node, is_too_short):
+            start_byte = node.start_byte
+            end_byte = node.end_byte
+            node_length = end_byte - start_byte
+            # Stripping only makes text shorter, so shorter nodes can never match
+            if node_length < target_length:
+                continue
+            # A node bounded by ASCII non-whitespace is unchanged by stripping, so
+            # its length alone decides; anything else is compared as text
+            if node_length != target_length and node_length:
+                first = source[start_byte]
+                last = source[end_byte - 1]
+                if (first < _ASCII_LIMIT and first not in _ASCII_WHITESPACE
+                        and last < _ASCII_LIMIT and last not in _ASCII_WHITESPACE):
+                    continue
             node_text = self.get_node_text(node).strip()
             if node_text == normalized_content:
                 return node
@@ -414,8 +582,11 @@ class IncrementalPatcher:
         """
         # Calculate the delta (how many bytes were added or removed)
         delta = new_end_byte - old_end_byte
+        if delta == 0:
+            # A same-length replacement moves nothing
+            return
 
-        for i, mod in enumerate(self.modifications):
+        for mod in self.modifications:
             # Skip modifications that have already been applied
             if mod.start_byte == edit_start_byte and mod.end_byte == old_end_byte:
                 continue
@@ -423,26 +594,37 @@ class IncrementalPatcher:
             # Update byte positions based on edit location
             if mod.start_byte > old_end_byte:
                 # If modification starts after the edit, shift by delta
-                self.modifications[i].start_byte += delta
-                self.modifications[i].end_byte += delta
+                mod.start_byte += delta
+                mod.end_byte += delta
             elif mod.start_byte < edit_start_byte and mod.end_byte > edit_start_byte:
                 # If edit happens inside a modification that hasn't been applied yet,
                 # extend the end position by delta
-                self.modifications[i].end_byte += delta
+                mod.end_byte += delta
 
-    def _walk_tree(self, node: Node) -> list[Node]:
+    def _walk_tree(self, node: Node, skip_children: Optional[Callable[[Node], bool]] = None) -> Iterator[Node]:
         """Walk the tree in a depth-first manner.
 
+        Nodes are produced lazily with a tree cursor, so callers can stop early.
+
         Args:
             node: The root node
+            skip_children: Optional predicate; descendants of nodes it accepts are not visited
 
-        Returns:
-            List of all nodes in the tree
+        Yields:
+            All nodes in the tree, in pre-order
         """
-        result = [node]
-        for child in node.children:
-            result.extend(self._walk_tree(child))
-        return result
+        cursor = node.walk()
+        while True:
+            current = cursor.node
+            if current is None:
+                return
+            yield current
+            if (skip_children is None or not skip_children(current)) and cursor.goto_first_child():
+                continue
+            # Move to the next sibling, climbing up until one exists
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return
 
     def apply_all_modifications(self) -> PatchResult:
         """Apply all registered modifications.
@@ -456,13 +638,14 @@ class IncrementalPatcher:
                 modified_content=self.current_content
             )
 
-        # Apply each modification, in order
-        # Each successful application will update the tree and byte positions
-        for i, modification in enumerate(self.modifications):
-            logger.info(f"Applying modification {i+1}/{len(self.modifications)}")
-            result = self.apply_modification(modification)
-            if not result.success:
-                return result
+        if not self._apply_all_bottom_up():
+            # Apply each modification, in order
+            # Each successful application edits the tree and updates byte positions
+            for i, modification in enumerate(self.modifications):
+                logger.info(f"Applying modification {i+1}/{len(self.modifications)}")
+                result = self.apply_modification(modification)
+                if not result.success:
+                    return result
 
         # Format the code if the language is supported
         if self.language_id:
@@ -471,18 +654,10 @@ class IncrementalPatcher:
                 # This is intentional - we format the complete file after all modifications, not each modification
                 formatted_content = format_code(self.current_content, self.language_id)
                 if formatted_content:
-                    # Update the current content with formatted code
+                    # Update the current content with formatted code; the tree is
+                    # re-parsed from scratch only if something asks for it
                     self.current_content = formatted_content
                     logger.info(f"Applied code formatting to {self.file_path}")
-
-                    # Re-parse the tree to keep it in sync with the formatted content
-                    try:
-                        parser = get_parser(self.language_id)
-                        self.tree = parser.parse(bytes(self.current_content, 'utf-8'))
-                        logger.debug("Successfully re-parsed tree after formatting")
-                    except Exception as parse_error:
-                        logger.warning(f"Failed to re-parse tree after formatting: {parse_error}")
-                        # Continue with the updated content but stale tree
                 else:
                     logger.warning(f"Code formatting failed for {self.file_path}, using unformatted content")
             except Exception as e:
@@ -494,6 +669,45 @@ class IncrementalPatcher:
             modified_content=self.current_content
         )
 
+    def _apply_all_bottom_up(self) -> bool:
+        """Apply all modifications as plain splices, from the end of the file backwards.
+
+        Splicing in descending byte order leaves the positions of the modifications
+        still to be applied untouched, so no offsets need updating, and the edits
+        are recorded on the tree for a single incremental reparse instead of one
+        per edit. This only works if no two modifications overlap and each still
+        matches the content at its position; otherwise nothing is applied and the
+        caller falls back to applying them one by one.
+
+        Returns:
+            True if all modifications were applied, False if nothing was applied
+        """
+        self._ensure_fresh_tree()
+        if not self.tree:
+            return False
+
+        ordered = sorted(self.modifications, key=lambda mod: (mod.start_byte, mod.end_byte), reverse=True)
+
+        # Each modification must end before the next one (in file order) starts
+        for later, earlier in pairwise(ordered):
+            if earlier.end_byte > later.start_byte:
+                logger.debug("Modifications overlap, applying them one by one")
+                return False
+
+        for modification in ordered:
+            if not self._content_matches_at(modification.start_byte, modification.end_byte, modification.original_node_text):
+                logger.debug("Content at byte positions has changed, applying modifications one by one")
+                return False
+
+        # Each edit is recorded on the tree as it is spliced; a single incremental
+        # reparse, done only when something next needs the tree, covers them all
+        for i, modification in enumerate(ordered):
+            logger.info(f"Applying modification {i+1}/{len(ordered)}")
+            self._record_edit(modification.start_byte, modification.end_byte,
+                              modification.modified_text.encode('utf-8'))
+
+        return True
+
     def validate_result(self) -> bool:
         """Validate that the resulting code is syntactically valid.
 
@@ -505,46 +719,56 @@ class IncrementalPatcher:
             logger.info("Skipping validation for unsupported language")
             return True
 
-        # Parse the code from scratch
-        try:
-            parser = get_parser(self.language_id)
-            tree = parser.parse(bytes(self.current_content, 'utf-8'))
-            if not tree:
-                logger.error("Failed to parse modified code")
-                return False
-        except Exception as e:
-            logger.error(f"Failed to parse modified code: {e}")
+        # Reuse the tree if it is up to date; otherwise parse once and keep the
+        # result for later lookups
+        if self.tree is None:
+            self._tree_dirty = True
+        self._ensure_fresh_tree()
+        tree = self.tree
+        if not tree:
+            logger.error("Failed to parse modified code")
             return False
 
-        # Check for syntax errors, but report details
+        # tree-sitter propagates has_error up from every ERROR and MISSING node,
+        # so a clean root means there is nothing to look for
+        if not tree.root_node.has_error:
+            return True
+
+        # Check for syntax errors, but report details; errors nested in an
+        # ERROR node are part of it and not reported separately, and subtrees
+        # without errors are not entered
         error_count = 0
         error_messages = []
 
-        def count_errors(node):
-            nonlocal error_count
-            if node.type == 'ERROR':
-                error_count += 1
+        for node in self._walk_tree(tree.root_node, lambda node: node.type == 'ERROR' or not node.has_error):
+            if node.type != 'ERROR':
+                continue
+            error_count += 1
+            if error_count > _MAX_REPORTED_ERRORS:
+                # Only counted; the text of unreported errors is never needed
+                continue
+            start_byte = node.start_byte
+            if node.end_byte - start_byte > _ERROR_CONTEXT_BYTES:
+                # Large error nodes are always truncated; decode only their head,
+                # dropping a character cut off at its end
+                head = self._source[start_byte:start_byte + _ERROR_CONTEXT_BYTES].decode('utf-8', errors='ignore')
+                context = head[:MAX_ERROR_CONTEXT_LENGTH] + "..."
+            else:
+                node_text = self.get_node_text(node)
                 context = (
-                    self.get_node_text(node)[:MAX_ERROR_CONTEXT_LENGTH] + "..."
-                    if len(self.get_node_text(node)) > MAX_ERROR_CONTEXT_LENGTH
-                    else self.get_node_text(node)
+                    node_text[:MAX_ERROR_CONTEXT_LENGTH] + "..."
+                    if len(node_text) > MAX_ERROR_CONTEXT_LENGTH
+                    else node_text
                 )
-                error_msg = f"Syntax error at line {node.start_point[0]+1}: {context}"
-                error_messages.append(error_msg)
-                return True
-
-            has_error = False
-            for child in node.children:
-                if count_errors(child):
-                    has_error = True
-            return has_error
+            error_msg = f"Syntax error at line {node.start_point[0]+1}: {context}"
+            error_messages.append(error_msg)
 
-        has_errors = count_errors(tree.root_node)
+        has_errors = error_count > 0
 
         # Log detailed error information
         if has_errors:
             logger.error(f"Found {error_count} syntax errors in modified code")
-            for msg in error_messages[:5]:  # Show only first 5 errors
+            for msg in error_messages:
                 logger.error(f"  {msg}")
 
             return False
@@ -557,7 +781,4 @@ class IncrementalPatcher:
         Returns:
             List of implemented suggestion IDs
         """
-        suggestion_ids = []
-        for modification in self.modifications:
-            suggestion_ids.extend(modification.suggestion_ids)
-        return suggestion_ids
+        return list(chain.from_iterable(modification.suggestion_ids for modification in self.modifications))
@@ -4,14 +4,14 @@ This module provides the main RefinementAgent class that orchestrates the proces
 of extracting context, generating changes with an LLM, and applying those changes.
 """
 
+import asyncio
 import logging
 import json
+from collections import Counter
 from typing import Dict, List, Optional, Any, Tuple, Set
 
-from tree_sitter import Node
-
-from agentic_code_review.github_app.managers.pr_manager import PRManager, PRContext
-from agentic_code_review.github_app.models import PRComment
+from agentic_code_review.github_app.managers.pr_manager import PRManager
+from agentic_code_review.github_app.models import PRComment, PRContext
 
 from .comment_processor import CommentProcessor
 from .context_extractor import ContextExtractor
@@ -35,8 +35,9 @@ class RefinementAgent:
         """
         self.pr_manager = pr_manager
         self.llm_client = llm_client
-        self.comment_processor = CommentProcessor()
         self.context_extractor = ContextExtractor()
+        # Share the extractor so grouping and context extraction reuse the same parse trees
+        self.comment_processor = CommentProcessor(self.context_extractor)
         
     async def process_pr(self, context: PRContext) -> bool:
         """Process a pull request and implement suggested changes.
@@ -48,8 +49,9 @@ class RefinementAgent:
             True if processing was successful, False otherwise
         """
         try:
-            # Get unresolved comments
-            comments = self.pr_manager.get_unresolved_comments(context)
+            # GitHub calls and tree-sitter work block, so they run in worker threads
+            # to keep the shared event loop free for other webhooks
+            comments = await asyncio.to_thread(self.pr_manager.get_unresolved_comments, context)
             if not comments:
                 logger.info("No unresolved comments to process")
                 return True
@@ -59,11 +61,21 @@ class RefinementAgent:
             for comment in comments:
                 logger.info(f"Comment ID {comment.id} at {comment.path}:{comment.line_number}:\n{comment.body}")
                 
-            # Group comments by file
-            file_comments = self.comment_processor.group_comments_by_file(comments)
+            # Count comments per file, keeping the order in which files first appear
+            file_comment_counts = Counter(comment.path for comment in comments)
             
             # Log the file grouping
-            logger.info(f"Comments grouped by file: {', '.join(f'{file}: {len(comments)}' for file, comments in file_comments.items())}")
+            logger.info(f"Comments grouped by file: {', '.join(f'{file}: {count}' for file, count in file_comment_counts.items())}")
+
+            # Fetch every file concurrently, then group the comments by file and code unit
+            # in one parallel pass instead of file by file
+            pr = await asyncio.to_thread(self.pr_manager._get_pr, context)
+            contents = await asyncio.gather(*(
+                asyncio.to_thread(self.pr_manager.get_file_content, pr.head.repo, file_path, pr.head.ref)
+                for file_path in file_comment_counts
+            ))
+            file_contents = dict(zip(file_comment_counts, contents, strict=True))
+            code_unit_groups = await asyncio.to_thread(self.comment_processor.group_all, comments, file_contents)
             
             # Process each file
             processed_files: List[str] = []  # List of successfully processed file paths
@@ -74,9 +86,11 @@ class RefinementAgent:
             all_implemented_suggestions: List[Tuple[str, str]] = []  # List of (suggestion_id, file_path) tuples
             all_skipped_suggestions: List[Tuple[str, str, str]] = []  # List of (suggestion_id, file_path, reason) tuples
             
-            for file_path, file_comments in file_comments.items():
+            for file_path in file_comment_counts:
                 logger.info(f"Processing file: {file_path}")
-                result, changes, implemented, skipped = await self._process_file(context, file_path, file_comments)
+                result, changes, implemented, skipped = await self._process_file(
+                    context, file_path, file_contents[file_path], code_unit_groups.get(file_path)
+                )
                 
                 if result:
                     processed_files.append(file_path)
@@ -104,7 +118,8 @@ class RefinementAgent:
                 for file_path, content in all_changes.items():
                     logger.info(f"FULL CHANGES TO COMMIT for {file_path}:\n{content}")
                 
-                commit_result = self.pr_manager.commit_changes(
+                commit_result = await asyncio.to_thread(
+                    self.pr_manager.commit_changes,
                     context,
                     all_changes,
                     commit_message
@@ -117,7 +132,7 @@ class RefinementAgent:
                     # Only resolve comments if the commit was successful
                     if all_implemented_suggestions:
                         logger.info(f"Resolving {len(all_implemented_suggestions)} implemented suggestions")
-                        self.pr_manager.resolve_comments(context, all_implemented_suggestions)
+                        await asyncio.to_thread(self.pr_manager.resolve_comments, context, all_implemented_suggestions)
                 else:
                     logger.error(f"Failed to commit changes to {len(all_changes)} files")
                     # Mark files as failed if the commit fails
@@ -132,7 +147,7 @@ class RefinementAgent:
             await self._report_processing_results(context, processed_files, failed_files, all_skipped_suggestions)
             
             # If we had files to process but none were successful, return False
-            if len(file_comments) > 0 and len(processed_files) == 0:
+            if len(file_comment_counts) > 0 and len(processed_files) == 0:
                 return False
                 
             # Otherwise, return True if we either had no changes or committed successfully
@@ -143,13 +158,21 @@ class RefinementAgent:
             # The decorator will handle error reporting and label cleanup
             return False
             
-    async def _process_file(self, context: PRContext, file_path: str, comments: List[PRComment]) -> Tuple[bool, Optional[Dict[str, str]], Optional[List[Tuple[str, str]]], Optional[List[Tuple[str, str, str]]]]:
+    async def _process_file(
+        self,
+        context: PRContext,
+        file_path: str,
+        file_content: Optional[str],
+        comments_by_code_unit: Optional[List[List[PRComment]]],
+    ) -> Tuple[bool, Optional[Dict[str, str]], Optional[List[Tuple[str, str]]], Optional[List[Tuple[str, str, str]]]]:
         """Process a file and apply code refinements.
         
         Args:
             context: The PR context
             file_path: Path to the file
-            comments: List of comments for the file
+            file_content: Content of the file at the PR head, or None if it could not be fetched
+            comments_by_code_unit: The file's comments grouped by code unit, or None if
+                they could not be grouped
             
         Returns:
             Tuple of (success, changes_dict, implemented_suggestions, skipped_suggestions)
@@ -159,18 +182,13 @@ class RefinementAgent:
             - skipped_suggestions: List of (suggestion_id, file_path, reason) tuples for skipped suggestions
         """
         try:
-            # Get the file content
-            pr = self.pr_manager._get_pr(context)
-            file_content = self.pr_manager.get_file_content(pr.head.repo, file_path, pr.head.ref)
             if not file_content:
                 logger.error(f"Failed to get content for {file_path}")
                 return False, None, None, None
+            if comments_by_code_unit is None:
+                logger.error(f"Failed to group comments for {file_path}")
+                return False, None, None, None
                 
-            # Initialize the incremental patcher for this file
-            patcher = IncrementalPatcher(file_content, file_path)
-            
-            # Group comments by code unit instead of proximity
-            comments_by_code_unit = self.comment_processor.group_comments_by_code_unit(comments, file_content, file_path)
             logger.info(f"Found {len(comments_by_code_unit)} code units with comments in {file_path}")
             
             # Log the code unit grouping
@@ -180,32 +198,19 @@ class RefinementAgent:
                     lines = [str(c.line_number) for c in unit_comments]
                     logger.info(f"Code unit {i+1}: Comment IDs {', '.join(comment_ids)} at lines {', '.join(lines)}")
             
+            # Context extraction and patching parse the file with tree-sitter, so both
+            # run in a worker thread; only the LLM calls run on the event loop
+            unit_contexts = await asyncio.to_thread(
+                self._extract_unit_contexts, file_path, file_content, comments_by_code_unit
+            )
+            
             # Track skipped suggestions
             skipped_suggestions: List[Tuple[str, str, str]] = []
+            unit_responses: List[Tuple[List[PRComment], RefinementResponse]] = []
             
             # Process each code unit's comments together
-            for unit_comments in comments_by_code_unit:
-                if not unit_comments:
-                    continue
-                    
-                # Get the primary comment (for line number reference)
-                primary_comment = unit_comments[0]
-                line = primary_comment.line_number
-                
-                # Extract code context for the comment
-                context_result = self.context_extractor.extract_context(file_path, file_content, line)
-                if not context_result:
-                    logger.warning(f"Could not extract context for comment at line {line} in {file_path}")
-                    continue
-                    
-                # Extract the code and context
-                code_text, code_context = context_result
-                
-                # Log the extracted code context
-                logger.info(f"Extracted code context for line {line}:\n{code_text}")
-                
-                # Extract file-level context
-                file_level_context = self.context_extractor.extract_file_level_context(file_path, file_content)
+            for unit_comments, code_text, file_level_context in unit_contexts:
+                line = unit_comments[0].line_number
                 
                 # Generate changes
                 response = await self._generate_changes(file_path, code_text, unit_comments, file_level_context)
@@ -216,48 +221,123 @@ class RefinementAgent:
                 # Collect skipped suggestions
                 for skipped in response.skipped_suggestions:
                     skipped_suggestions.append((skipped.suggestion_id, file_path, skipped.reason))
-                    
-                # Find the node that should be modified
-                node = patcher.get_containing_code_unit(line)
-                if not node:
-                    logger.warning(f"Could not find node for comment at line {line} in {file_path}")
-                    continue
-                    
-                # Register the modification with the patcher
-                # Ensure all suggestion IDs are strings
-                suggestion_ids = [str(comment.id) for comment in unit_comments]
-                
-                # Register import modifications if any new imports were provided
-                if response.new_imports and response.new_imports.strip():
-                    logger.info(f"Registering new imports: {response.new_imports}")
-                    patcher.register_imports_modification(response.new_imports, suggestion_ids)
-                    
-                # Register the code modification
-                patcher.register_modification(node, response.modified_code, suggestion_ids)
-                
-            # Apply all modifications
-            result = patcher.apply_all_modifications()
-            if not result.success:
-                logger.error(f"Failed to apply modifications to {file_path}: {result.error_message}")
-                return False, None, None, None
+                unit_responses.append((unit_comments, response))
                 
-            # Validate the result
-            if not patcher.validate_result():
-                logger.error(f"Validation failed for {file_path}")
+            patch_result = await asyncio.to_thread(self._apply_changes, file_path, file_content, unit_responses)
+            if not patch_result:
                 return False, None, None, None
+            modified_content, implemented_suggestions = patch_result
                 
             # Instead of committing here, return the changes to be committed later
-            implemented_suggestions = patcher.get_implemented_suggestions()
             # Ensure all suggestion IDs are strings
             suggestion_tuples = [(str(id), file_path) for id in implemented_suggestions]
             
             # Return success, changes dict, implemented suggestions, and skipped suggestions
-            return True, {file_path: result.modified_content}, suggestion_tuples, skipped_suggestions
+            return True, {file_path: modified_content}, suggestion_tuples, skipped_suggestions
             
         except Exception as e:
             logger.error(f"Failed to process file {file_path}: {e}")
             return False, None, None, None
     
+    def _extract_unit_contexts(
+        self,
+        file_path: str,
+        file_content: str,
+        comments_by_code_unit: List[List[PRComment]],
+    ) -> List[Tuple[List[PRComment], str, Dict[str, Any]]]:
+        """Extract the code and file-level context for each commented code unit.
+
+        Args:
+            file_path: Path to the file
+            file_content: Content of the file at the PR head
+            comments_by_code_unit: The file's comments grouped by code unit
+
+        Returns:
+            List of (unit_comments, code_text, file_level_context) tuples, one per
+            code unit whose context could be extracted
+        """
+        unit_contexts: List[Tuple[List[PRComment], str, Dict[str, Any]]] = []
+        for unit_comments in comments_by_code_unit:
+            if not unit_comments:
+                continue
+                
+            # Get the primary comment (for line number reference)
+            line = unit_comments[0].line_number
+            
+            # Extract code context for the comment
+            context_result = self.context_extractor.extract_context(file_path, file_content, line)
+            if not context_result:
+                logger.warning(f"Could not extract context for comment at line {line} in {file_path}")
+                continue
+                
+            # Extract the code and context
+            code_text, code_context = context_result
+            
+            # Log the extracted code context
+            logger.info(f"Extracted code context for line {line}:\n{code_text}")
+            
+            # Extract file-level context
+            file_level_context = self.context_extractor.extract_file_level_context(file_path, file_content)
+            unit_contexts.append((unit_comments, code_text, file_level_context))
+        return unit_contexts
+
+    def _apply_changes(
+        self,
+        file_path: str,
+        file_content: str,
+        unit_responses: List[Tuple[List[PRComment], RefinementResponse]],
+    ) -> Optional[Tuple[str, List[str]]]:
+        """Apply the generated changes for a file's code units with an incremental patcher.
+
+        The patcher is created and used within this one call, so its cached parser
+        is only ever used by the thread it was fetched for.
+
+        Args:
+            file_path: Path to the file
+            file_content: Content of the file at the PR head
+            unit_responses: List of (unit_comments, response) tuples, one per code unit
+
+        Returns:
+            Tuple of (modified_content, implemented_suggestion_ids), or None if the
+            changes could not be applied or the result is invalid
+        """
+        # Initialize the incremental patcher for this file
+        patcher = IncrementalPatcher(file_content, file_path, self.context_extractor)
+        
+        for unit_comments, response in unit_responses:
+            line = unit_comments[0].line_number
+            
+            # Find the node that should be modified
+            node = patcher.get_containing_code_unit(line)
+            if not node:
+                logger.warning(f"Could not find node for comment at line {line} in {file_path}")
+                continue
+                
+            # Register the modification with the patcher
+            # Ensure all suggestion IDs are strings
+            suggestion_ids = [str(comment.id) for comment in unit_comments]
+            
+            # Register import modifications if any new imports were provided
+            if response.new_imports and response.new_imports.strip():
+                logger.info(f"Registering new imports: {response.new_imports}")
+                patcher.register_imports_modification(response.new_imports, suggestion_ids)
+                
+            # Register the code modification
+            patcher.register_modification(node, response.modified_code, suggestion_ids)
+            
+        # Apply all modifications
+        result = patcher.apply_all_modifications()
+        if not result.success:
+            logger.error(f"Failed to apply modifications to {file_path}: {result.error_message}")
+            return None
+            
+        # Validate the result
+        if not patcher.validate_result():
+            logger.error(f"Validation failed for {file_path}")
+            return None
+            
+        return result.modified_content, patcher.get_implemented_suggestions()
+    
     async def _generate_changes(
         self,
         file_path: str,
@@ -421,7 +501,7 @@ class RefinementAgent:
         
         # Post the report as a comment
         try:
-            self.pr_manager.post_comment(context, "\n".join(report))
+            await asyncio.to_thread(self.pr_manager.post_comment, context, "\n".join(report))
         except Exception as e:
             logger.error(f"Failed to post processing report: {e}")
                 
\ No newline at end of file
@@ -9,9 +9,7 @@ To add support for a new language:
 """
 
 import logging
-import os
 import subprocess
-import tempfile
 from collections.abc import Callable
 from typing import Optional
 
@@ -77,60 +75,30 @@ def _format_python(code_content: str) -> Optional[str]:
     Returns:
         The formatted code content if successful, None otherwise
     """
-    # Create a temporary file with the code content
-    temp_path = None
-    output_path = None
+    # Use autopep8 with aggressive flag, reading the code from stdin ("-") and
+    # writing the result to stdout, so no temporary files are needed
+    formatter_cmd = ["poetry", "run", "autopep8", "--aggressive", "-"]
+
     try:
-        with tempfile.NamedTemporaryFile(suffix=".py", mode="w+", delete=False) as temp_file:
-            temp_path = temp_file.name
-            temp_file.write(code_content)
-
-        # Create a temporary file for output
-        with tempfile.NamedTemporaryFile(suffix=".py", mode="w+", delete=False) as output_file:
-            output_path = output_file.name
-
-        # Use autopep8 with aggressive flag
-        formatter_cmd = ["poetry", "run", "autopep8", "--aggressive"]
-
-        try:
-            cmd = [*formatter_cmd, temp_path]
-
-            logger.debug("Attempting to format with autopep8")
-
-            # Redirect output to output file
-            with open(output_path, "w") as output_file:
-                result = subprocess.run(
-                    cmd,
-                    stdout=output_file,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    check=False
-                )
-
-            if result.returncode == 0:
-                logger.debug("Successfully formatted with autopep8")
-                with open(output_path) as f:
-                    formatted_content = f.read()
-
-                return formatted_content
-            else:
-                logger.debug(f"autopep8 formatting failed: {result.stderr}")
-                return None
-        except Exception as e:
-            logger.debug(f"Error using autopep8: {e}")
+        logger.debug("Attempting to format with autopep8")
+
+        result = subprocess.run(
+            formatter_cmd,
+            input=code_content,
+            capture_output=True,
+            text=True,
+            check=False
+        )
+
+        if result.returncode == 0:
+            logger.debug("Successfully formatted with autopep8")
+            return result.stdout
+        else:
+            logger.debug(f"autopep8 formatting failed: {result.stderr}")
             return None
-
     except Exception as e:
-        logger.error(f"Error during Python code formatting: {e}")
+        logger.debug(f"Error using autopep8: {e}")
         return None
-    finally:
-        # Clean up the temporary files
-        for path in [temp_path, output_path]:
-            if path and os.path.exists(path):
-                try:
-                    os.unlink(path)
-                except Exception as cleanup_error:
-                    logger.warning(f"Failed to remove temporary file: {cleanup_error}")
 
 # Template for adding new language formatters:
 """
@@ -0,0 +1,8 @@
+"""Shared pytest configuration."""
+
+import os
+
+# The application settings are loaded when the package is imported and these have no
+# defaults; the tests never talk to GitHub or the LLM, so placeholders are enough
+for _name in ("GITHUB_APP_ID", "GITHUB_PRIVATE_KEY", "GITHUB_WEBHOOK_SECRET", "LLM_API_KEY"):
+    os.environ.setdefault(_name, "test")
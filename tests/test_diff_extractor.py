@@ -0,0 +1,95 @@
+"""Tests for the diff extractor."""
+
+from agentic_code_review.llm_refiner.diff_extractor import DiffExtractor
+
+BEFORE = (
+    "def greet(name):\n"
+    "    greeting = 'Hello'\n"
+    "    separator = ' '\n"
+    "    punctuation = '.'\n"
+    "    return greeting + separator + name + punctuation\n"
+    "\n"
+    "\n"
+    "def farewell(name):\n"
+    "    farewell = 'Bye'\n"
+    "    return farewell + ' ' + name\n"
+)
+
+AFTER = (
+    "def greet(name):\n"
+    "    greeting = 'Hi'\n"
+    "    separator = ' '\n"
+    "    punctuation = '!'\n"
+    "    return greeting + separator + name + punctuation\n"
+    "\n"
+    "\n"
+    "def farewell(name):\n"
+    "    farewell = 'Goodbye'\n"
+    "    return farewell + ' ' + name\n"
+)
+
+# Two hunks in greet and one in farewell
+GREET_HUNKS = [
+    (
+        "@@ -1,2 +1,2 @@\n"
+        " def greet(name):\n"
+        "-    greeting = 'Hello'\n"
+        "+    greeting = 'Hi'"
+    ),
+    (
+        "@@ -4,2 +4,2 @@\n"
+        "-    punctuation = '.'\n"
+        "+    punctuation = '!'\n"
+        "     return greeting + separator + name + punctuation"
+    ),
+]
+FAREWELL_HUNKS = [
+    (
+        "@@ -8,3 +8,3 @@\n"
+        " def farewell(name):\n"
+        "-    farewell = 'Bye'\n"
+        "+    farewell = 'Goodbye'\n"
+        "     return farewell + ' ' + name"
+    ),
+]
+
+PATCH = "".join(f"{hunk}\n" for hunk in GREET_HUNKS + FAREWELL_HUNKS)
+
+
+def test_collect_unique_diff_units_keeps_raw_hunks_when_annotation_is_disabled():
+    """Without annotation, every unit holds its hunks exactly as they appear in the patch."""
+    units = DiffExtractor(annotate_lines=False).collect_unique_diff_units(PATCH, "greet.py", BEFORE, AFTER)
+
+    assert [unit.diff_texts for unit in units] == [GREET_HUNKS, FAREWELL_HUNKS]
+    assert "".join(f"{text}\n" for unit in units for text in unit.diff_texts) == PATCH
+
+
+def test_collect_unique_diff_units_annotates_lines_by_default():
+    """By default, every diff line is prefixed with its old and/or new line number."""
+    units = DiffExtractor().collect_unique_diff_units(PATCH, "greet.py", BEFORE, AFTER)
+
+    assert [unit.diff_texts for unit in units] == [
+        [
+            (
+                "@@ -1,2 +1,2 @@\n"
+                " 1,1: def greet(name):\n"
+                "-2:     greeting = 'Hello'\n"
+                "+2:     greeting = 'Hi'"
+            ),
+            (
+                "@@ -4,2 +4,2 @@\n"
+                "-4:     punctuation = '.'\n"
+                "+4:     punctuation = '!'\n"
+                " 5,5:     return greeting + separator + name + punctuation"
+            ),
+        ],
+        [
+            (
+                "@@ -8,3 +8,3 @@\n"
+                " 8,8: def farewell(name):\n"
+                "-9:     farewell = 'Bye'\n"
+                "+9:     farewell = 'Goodbye'\n"
+                " 10,10:     return farewell + ' ' + name"
+            ),
+        ],
+    ]